@@ -0,0 +1,138 @@
+"""
+micro benchmarks of the operand stack: the bulk operations of
+interpreter/stack.py against a `pop` per operand, then the instructions
+using them run by ExecutionLoop
+
+python3.12 benchmarks/micro_stack.py
+python3.12 benchmarks/micro_stack.py --number 20000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from interpreter.loop import ExecutionLoop  # noqa: E402
+from interpreter.stack import Stack  # noqa: E402
+
+COUNTS = (2, 8, 32)
+
+
+def pop_each(stack, count):
+    values = [stack.pop() for _ in range(count)]
+    values.reverse()
+    return tuple(values)
+
+
+def concat(stack, count):
+    v = ""
+    for _ in range(count):
+        v = stack.pop() + v
+    return v
+
+
+def join(stack, count):
+    return "".join(stack.popn(count))
+
+
+STRATEGIES = {
+    "pop each": (pop_each, lambda count: 0),
+    "popn": (Stack.popn, lambda count: 0),
+    "peekn+dropn": (
+        lambda stack, count: (stack.peekn(count), stack.dropn(count)),
+        lambda count: 0,
+    ),
+    "string concat": (concat, lambda count: "x" * 16),
+    "string join": (join, lambda count: "x" * 16),
+}
+
+
+def make_args(n):
+    return ", ".join(f"a{i}" for i in range(n))
+
+
+# a function of each instruction, called in a loop by ExecutionLoop
+PROGRAMS = {
+    "CALL 8 args": f"""
+def f({make_args(8)}):
+    pass
+def bench(n):
+    for _ in range(n):
+        f(1, 2, 3, 4, 5, 6, 7, 8)
+""",
+    "BUILD_TUPLE 8": """
+def bench(n):
+    a = b = 1
+    for _ in range(n):
+        (a, b, a, b, a, b, a, b)
+""",
+    "BUILD_LIST 8": """
+def bench(n):
+    a = b = 1
+    for _ in range(n):
+        [a, b, a, b, a, b, a, b]
+""",
+    "BUILD_MAP 4": """
+def bench(n):
+    a = b = 1
+    for _ in range(n):
+        {a: b, b: a, "c": a, "d": b}
+""",
+    "BUILD_STRING 9": """
+def bench(n):
+    a = "x" * 16
+    for _ in range(n):
+        f"{a}-{a}-{a}-{a}-{a}"
+""",
+}
+
+
+def stack_times(number):
+    for name, (strategy, value) in STRATEGIES.items():
+        results = []
+        for count in COUNTS:
+            stack = Stack([value(count)] * count)
+            # the values are pushed back in place of the popped ones
+            fill = [value(count)] * count
+            elapsed = min(
+                timeit.repeat(
+                    lambda: (strategy(stack, count), stack.extend(fill)),
+                    number=number,
+                    repeat=5,
+                )
+            )
+            results.append(f"n={count}: {elapsed / number * 1e6:.2f}us")
+        print(f"{name:<16} {'  '.join(results)}")
+
+
+def opcode_times(number):
+    for name, source in PROGRAMS.items():
+        loop = ExecutionLoop(
+            compile(source, f"<{name}>", "exec"),
+            co_globals={"__name__": "__main__"},
+        )
+        loop.run()
+        bench = loop.co_globals["bench"]
+        elapsed = min(timeit.repeat(lambda: bench(number), number=1, repeat=5))
+        print(f"{name:<16} {elapsed / number * 1e9:.0f}ns per iteration")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="micro_stack",
+        description="micro benchmarks of the operand stack",
+    )
+    parser.add_argument("--number", type=int, default=100_000, help="runs timed")
+    flags = parser.parse_args()
+
+    stack_times(flags.number)
+    print()
+    opcode_times(flags.number // 10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+# list, set and dict comprehensions
+squares = [i * i for i in range(20000)]
+evens = {i for i in squares if i % 2 == 0}
+index = {i: i % 97 for i in range(20000)}
+matrix = [[i * j for j in range(60)] for i in range(60)]
+print(len(squares), len(evens), len(index), sum([sum(row) for row in matrix]))
@@ -0,0 +1,30 @@
+# coroutines awaiting each other, async generators and tasks run by asyncio
+import asyncio
+
+
+async def square(n):
+    await asyncio.sleep(0)
+    return n * n
+
+
+async def squares(n):
+    for i in range(n):
+        yield await square(i)
+
+
+async def worker(name, count):
+    total = 0
+    async for value in squares(count):
+        total += value
+    return total
+
+
+async def main():
+    results = await asyncio.gather(*(worker(i, 300) for i in range(20)))
+    print(sum(results))
+    lock = asyncio.Lock()
+    async with lock:
+        print(await square(12))
+
+
+asyncio.run(main())
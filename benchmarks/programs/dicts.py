@@ -0,0 +1,13 @@
+# dict heavy code: counting, merging, lookups
+words = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+counts = {}
+for i in range(30000):
+    word = words[i % 8]
+    counts[word] = counts.get(word, 0) + 1
+
+merged = {**counts, "iota": 1}
+lookups = 0
+for i in range(20000):
+    if words[i % 8] in merged:
+        lookups += merged[words[i % 8]] % 3
+print(sorted(counts.items()), lookups)
@@ -0,0 +1,18 @@
+# generator functions consumed by for loops and builtins
+def numbers(n):
+    for i in range(n):
+        yield i
+
+
+def evens(source):
+    for value in source:
+        if value % 2 == 0:
+            yield value
+
+
+total = 0
+for v in evens(numbers(30000)):
+    total += v
+print(total)
+print(sum(numbers(20000)))
+print(len(list(evens(numbers(20000)))))
@@ -0,0 +1,12 @@
+# startup dominated by module imports
+import json
+import collections
+import decimal
+import fractions
+import statistics
+from datetime import datetime as dt
+from urllib.parse import urlparse
+
+print(json.dumps({"a": 1}), collections.Counter("abca").most_common(1))
+print(decimal.Decimal("1.1"), fractions.Fraction(1, 3), statistics.mean([1, 2, 3]))
+print(dt(2020, 1, 1).year, urlparse("http://example.com/x").netloc)
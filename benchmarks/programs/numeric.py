@@ -0,0 +1,20 @@
+# integer and float arithmetic in tight loops
+total = 0
+for i in range(60000):
+    total += i * i % 7 - (i >> 2)
+print(total)
+
+n = 27
+steps = 0
+while n != 1:
+    if n % 2 == 0:
+        n = n // 2
+    else:
+        n = 3 * n + 1
+    steps += 1
+print(steps)
+
+x = 0.0
+for i in range(20000):
+    x = x * 0.5 + i / 3.0
+print(round(x, 3))
@@ -0,0 +1,7 @@
+# f-strings going through FORMAT_VALUE and BUILD_STRING
+lines = []
+for i in range(8000):
+    ratio = i / 7
+    lines.append(f"row {i:>6} | {ratio:10.3f} | {i!r} | {hex(i)} | {'even' if i % 2 == 0 else 'odd'}")
+print(len(lines), lines[-1])
+print(len("\n".join(lines)))
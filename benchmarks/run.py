@@ -0,0 +1,223 @@
+"""
+benchmark the interpreter against native CPython
+
+each program of benchmarks/programs is run `--repeat` times in a fresh worker
+process, under ExecutionLoop and natively, the best time is kept
+
+python3.12 benchmarks/run.py
+python3.12 benchmarks/run.py --output results.json --baseline benchmarks/baseline.json
+python3.12 benchmarks/run.py --save-baseline benchmarks/baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROGRAMS = os.path.join(ROOT, "benchmarks", "programs")
+
+sys.path.insert(0, ROOT)
+
+
+def _run_native(code):
+    exec(code, {"__name__": "__main__", "__file__": code.co_filename})
+
+
+def _run_interpreted(code, notify=None):
+    from interpreter.loop import ExecutionLoop
+
+    loop = ExecutionLoop(
+        code,
+        name="MainLoop",
+        co_globals={"__name__": "__main__", "__file__": code.co_filename},
+    )
+    if notify:
+        loop.on_notify("INSTRUCTION", notify)
+    loop.run()
+
+
+def worker(mode, path, prefetch=0):
+    """run `path` once, print the measures as json on stdout"""
+    with open(path) as f:
+        code = compile(f.read(), path, "exec")
+
+    if mode == "interpreted":
+        # the interpreter import isn't part of the measure
+        import interpreter.loop  # noqa: F401
+        from interpreter import generator
+
+        generator.PREFETCH = prefetch
+
+    run = _run_interpreted if mode == "interpreted" else _run_native
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        run(code)
+        elapsed = time.perf_counter() - start
+
+    result = {
+        "time_s": elapsed,
+        # kilobytes on linux
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+    if mode == "interpreted":
+        # counted on a second run, the hook slow down the loop
+        counter = [0]
+
+        def count(loop):
+            counter[0] += 1
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            _run_interpreted(code, notify=count)
+        result["instructions"] = counter[0]
+
+    print(json.dumps(result))
+
+
+def _spawn(mode, path, prefetch):
+    process = subprocess.run(
+        [
+            sys.executable,
+            __file__,
+            "--worker",
+            mode,
+            path,
+            "--generator-prefetch",
+            str(prefetch),
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(process.stdout)
+
+
+def bench(path, repeat, prefetch=0):
+    measures = {}
+    for mode in ("interpreted", "native"):
+        runs = [_spawn(mode, path, prefetch) for _ in range(repeat)]
+        best = min(runs, key=lambda run: run["time_s"])
+        best["peak_rss_kb"] = max(run["peak_rss_kb"] for run in runs)
+        measures[mode] = best
+
+    interpreted, native = measures["interpreted"], measures["native"]
+    return {
+        "interpreted_s": interpreted["time_s"],
+        "native_s": native["time_s"],
+        "slowdown": interpreted["time_s"] / native["time_s"],
+        "instructions": interpreted["instructions"],
+        "instructions_per_s": interpreted["instructions"] / interpreted["time_s"],
+        "peak_rss_kb": {
+            "interpreted": interpreted["peak_rss_kb"],
+            "native": native["peak_rss_kb"],
+        },
+    }
+
+
+def compare(results, baseline, tolerance):
+    """
+    names of the programs whose slowdown against native grew by more than
+    `tolerance` from the baseline: the ratio is measured in the same session,
+    the baseline holds on another machine where the absolute times don't
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name}: not in the baseline", file=sys.stderr)
+            continue
+        if result["slowdown"] > reference["slowdown"] * (1 + tolerance):
+            regressions.append(name)
+    return regressions
+
+
+def report(results, regressions, file=sys.stderr):
+    print(
+        f"{'program':<16} {'interp(ms)':>11} {'native(ms)':>11} {'slowdown':>9}"
+        f" {'inst/s':>11} {'rss(kB)':>9}",
+        file=file,
+    )
+    for name, result in results.items():
+        flag = "  REGRESSION" if name in regressions else ""
+        print(
+            f"{name:<16} {result['interpreted_s'] * 1e3:>11.2f}"
+            f" {result['native_s'] * 1e3:>11.2f} {result['slowdown']:>9.1f}"
+            f" {result['instructions_per_s']:>11.0f}"
+            f" {result['peak_rss_kb']['interpreted']:>9}{flag}",
+            file=file,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="benchmarks",
+        description="benchmark the interpreter against native CPython",
+    )
+    parser.add_argument("programs", nargs="*", help="programs names, default all")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per program")
+    parser.add_argument("--output", help="write the results as json in OUTPUT")
+    parser.add_argument("--baseline", help="json results to compare against")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.10,
+        help="slowdown ratio against the baseline flagged as regression",
+    )
+    parser.add_argument("--save-baseline", help="write the results as new baseline")
+    parser.add_argument(
+        "--generator-prefetch",
+        type=int,
+        default=0,
+        metavar="N",
+        help="run the interpreted generators ahead by up to N values",
+    )
+    parser.add_argument("--worker", nargs=2, help=argparse.SUPPRESS)
+    flags = parser.parse_args()
+
+    if flags.worker:
+        worker(*flags.worker, prefetch=flags.generator_prefetch)
+        return
+
+    names = flags.programs or sorted(
+        name.removesuffix(".py") for name in os.listdir(PROGRAMS) if name.endswith(".py")
+    )
+    results = {
+        name: bench(
+            os.path.join(PROGRAMS, f"{name}.py"), flags.repeat, flags.generator_prefetch
+        )
+        for name in names
+    }
+
+    regressions = []
+    if flags.baseline:
+        with open(flags.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, flags.tolerance)
+
+    report(results, regressions)
+
+    output = {
+        "python": platform.python_version(),
+        "results": results,
+        "regressions": regressions,
+    }
+    for path in (flags.output, flags.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(output, f, indent=2)
+    if not flags.output:
+        json.dump(output, sys.stdout, indent=2)
+        print()
+
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
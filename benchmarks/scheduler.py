@@ -0,0 +1,105 @@
+"""
+run many tenant scripts time-sliced on one thread with the scheduler of
+interpreter/scheduler.py, one of them never ends and is killed by its
+instruction limit, report the latency between the slices
+
+python3.12 benchmarks/scheduler.py
+python3.12 benchmarks/scheduler.py --tasks 500 --budget 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from interpreter.scheduler import Scheduler  # noqa: E402
+
+TENANT = """
+def fib(n):
+    if n < 2:
+        return n
+    return fib(n - 1) + fib(n - 2)
+
+
+total = 0
+for i in range(seed % 20 + 5):
+    total += fib(12)
+result = total
+"""
+
+RUNAWAY = """
+count = 0
+while True:
+    count += 1
+"""
+
+
+def percentile(values, ratio):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="scheduler",
+        description="run tenant scripts time-sliced on one thread",
+    )
+    parser.add_argument("--tasks", type=int, default=200, help="tenant scripts")
+    parser.add_argument(
+        "--budget", type=int, default=1000, help="instructions per slice"
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=2_000_000,
+        help="instructions of the runaway script before it's killed",
+    )
+    flags = parser.parse_args()
+
+    scheduler = Scheduler(budget=flags.budget)
+    tenant = compile(TENANT, "<tenant>", "exec")
+    runaway = scheduler.spawn(
+        compile(RUNAWAY, "<runaway>", "exec"),
+        name="runaway",
+        max_instructions=flags.limit,
+    )
+    tenants = [
+        scheduler.spawn(
+            tenant,
+            name=f"tenant-{seed}",
+            co_globals={"__name__": "__main__", "seed": seed},
+        )
+        for seed in range(flags.tasks)
+    ]
+
+    start = time.perf_counter()
+    scheduler.run()
+    elapsed = time.perf_counter() - start
+
+    failed = [task for task in tenants if task.state != "done"]
+    for task in failed[:20]:
+        print(f"{task.name}: {task.state} {task.error!r}", file=sys.stderr)
+    waits = [task.max_wait_s * 1000 for task in tenants]
+    walls = [task.wall_s * 1000 for task in tenants]
+    print(
+        f"{flags.tasks} tenants + 1 runaway, budget {flags.budget}: {elapsed:.2f}s\n"
+        f"runaway: {runaway.state} after {runaway.instructions} instructions,"
+        f" {runaway.slices} slices, {runaway.cpu_s:.2f}s cpu\n"
+        f"tenants max wait between slices (ms):"
+        f" p50 {percentile(waits, 0.5):.2f} p99 {percentile(waits, 0.99):.2f}"
+        f" max {max(waits):.2f}\n"
+        f"tenants completion (ms):"
+        f" p50 {percentile(walls, 0.5):.1f} p99 {percentile(walls, 0.99):.1f}"
+        f" max {max(walls):.1f}\n"
+        f"{len(failed)} tenants failed",
+        file=sys.stderr,
+    )
+    sys.exit(1 if failed or runaway.state != "killed" else 0)
+
+
+if __name__ == "__main__":
+    main()
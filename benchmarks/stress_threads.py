@@ -0,0 +1,107 @@
+"""
+stress the interpreter with hundreds of ExecutionLoop running concurrently
+from a thread pool, each script checks from a native callback that the
+current loops are its own
+
+python3.12 benchmarks/stress_threads.py
+python3.12 benchmarks/stress_threads.py --loops 1000 --threads 64
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from interpreter.debug import currentLoop  # noqa: E402
+from interpreter.loop import ExecutionLoop  # noqa: E402
+
+SCRIPT = """
+def fib(n):
+    if n < 2:
+        return check(n)
+    return fib(n - 1) + fib(n - 2)
+
+
+def numbers(n):
+    for i in range(n):
+        yield check(i)
+
+
+result = fib(seed % 8 + 6) + sum(numbers(seed % 50)) + sum([check(i) for i in range(10)])
+"""
+
+
+def fib(n):
+    return n if n < 2 else fib(n - 1) + fib(n - 2)
+
+
+def expected(seed):
+    return fib(seed % 8 + 6) + sum(range(seed % 50)) + sum(range(10))
+
+
+def run(seed, errors):
+    # a code object per loop, the loops prepare them concurrently
+    code = compile(SCRIPT, f"<stress-{seed}>", "exec")
+    loop = None
+
+    def check(value):
+        # the outermost loop of this thread is the module, the innermost
+        # one is the loop calling `check`
+        loops = currentLoop.getAll()
+        if loops[0] is not loop or currentLoop.get().co_globals["seed"] != seed:
+            errors.append(f"loop {seed}: wrong current loops {loops}")
+        return value
+
+    loop = ExecutionLoop(
+        code,
+        name=f"Loop-{seed}",
+        co_globals={"__name__": "__main__", "seed": seed, "check": check},
+    )
+    with currentLoop(loop):
+        loop.run()
+
+    if currentLoop.getAll():
+        errors.append(f"loop {seed}: current loops left {currentLoop.getAll()}")
+    result = loop.co_globals["result"]
+    if result != expected(seed):
+        errors.append(f"loop {seed}: result {result} != {expected(seed)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="stress_threads",
+        description="run many ExecutionLoop concurrently from a thread pool",
+    )
+    parser.add_argument("--loops", type=int, default=500, help="loops to run")
+    parser.add_argument("--threads", type=int, default=32, help="size of the pool")
+    flags = parser.parse_args()
+
+    # switch threads as often as possible
+    sys.setswitchinterval(1e-6)
+    errors = []
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=flags.threads) as pool:
+        futures = [pool.submit(run, seed, errors) for seed in range(flags.loops)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    for error in errors[:20]:
+        print(error, file=sys.stderr)
+    print(
+        f"{flags.loops} loops on {flags.threads} threads"
+        f" ({threading.active_count()} alive): {len(errors)} errors in {elapsed:.2f}s",
+        file=sys.stderr,
+    )
+    sys.exit(1 if errors else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,19 @@
 import argparse
 import dis
+import json
 import logging
 import sys
 from contextlib import suppress
 
+from interpreter import generator, optimizer
+from interpreter.batch import run_batch
+from interpreter.cache import ProgramCache
+from interpreter.calltrace import CallTracer
 from interpreter.debug import critical_logger, currentLoop, debug_visual
 from interpreter.loop import ExecutionLoop
+from interpreter.namespace import LOAD_CACHE
+from interpreter.profiler import Profiler
+from interpreter.tracer import SIZE, Tracer, replay
 
 
 def main():
@@ -13,12 +21,13 @@ def main():
         prog="python-interpreter",
         description="a python bytes code interpreter coded in python",
     )
-    parser.add_argument("file", help="file to execute")
+    parser.add_argument("file", help="file to execute", nargs="?")
     parser.add_argument(
         "-o",
-        help="generator ouput bytes code in output.txt",
-        action="store_true",
-        default=True,
+        help="write the disassembled bytes code in O, default output.txt",
+        nargs="?",
+        const="output.txt",
+        default=None,
     )
     parser.add_argument(
         "--level",
@@ -30,38 +39,204 @@ def main():
         "--debug", help="show instructions debugs", action="store_true", default=False
     )
     parser.add_argument("--debug-step", help="number/float or 'step", default=0.3)
+    parser.add_argument(
+        "--cache-stats",
+        help="show the name loads inline caches hits/misses on stderr",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--profile",
+        help="profile the opcodes, print a report on stderr and write it as json in PROFILE",
+        nargs="?",
+        const="profile.json",
+        default=None,
+    )
+    parser.add_argument(
+        "--trace-calls",
+        help="write the calls as chrome trace events in TRACE_CALLS, and as folded stacks",
+        nargs="?",
+        const="calls.json",
+        default=None,
+    )
+    parser.add_argument(
+        "--trace",
+        help="record the last instructions in a ring buffer, dumped in TRACE on a crash",
+        nargs="?",
+        const="trace.bin",
+        default=None,
+    )
+    parser.add_argument(
+        "--trace-size",
+        help="instructions kept by --trace",
+        type=int,
+        default=SIZE,
+    )
+    parser.add_argument(
+        "--replay",
+        help="show the instructions of a --trace dump, step by step with --debug",
+        metavar="TRACE",
+    )
+    parser.add_argument(
+        "--last",
+        help="instructions shown by --replay, default all",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--no-optimize",
+        help="execute the instructions as decoded, without folding/dead code removal",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--generator-prefetch",
+        help="run the generators iterated by for loops ahead, buffering up to N values",
+        type=int,
+        default=0,
+        metavar="N",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        help="directory of the prepared programs cache, default ~/.cache/python-interpreter",
+        default=None,
+    )
+    parser.add_argument(
+        "--no-cache",
+        help="compile and prepare the program without the on-disk cache",
+        action="store_true",
+        default=False,
+    )
+    parser.add_argument(
+        "--batch",
+        help="run the scripts (*.py) of the directory BATCH on a pool of processes",
+        metavar="DIR",
+    )
+    parser.add_argument(
+        "--workers",
+        help="processes of --batch, default the number of cpus",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "--report",
+        help="write the json report of --batch in REPORT, default on stdout",
+        default=None,
+    )
     flags = parser.parse_args()
 
-    with open(flags.file) as f:
-        content = f.read()
+    if flags.debug:
+        with suppress(Exception):
+            if "." in flags.debug_step:
+                flags.debug_step = float(flags.debug_step)
+            else:
+                flags.debug_step = int(flags.debug_step)
 
-    if flags.o:
-        with open("output.txt", "w") as f:
-            dis.dis(content, file=f)
+    if flags.batch:
+        batch(flags)
+        return
+    if flags.replay:
+        replay(flags.replay, flags.last, flags.debug_step if flags.debug else None)
+        return
+    if flags.file is None:
+        parser.error("the file to execute is required without --batch or --replay")
+
+    with open(flags.file, "rb") as f:
+        content = f.read()
 
     if not flags.debug:
         logging.basicConfig(stream=sys.stdout, level=flags.level)
 
+    if flags.no_optimize:
+        optimizer.ENABLED = False
+    generator.PREFETCH = flags.generator_prefetch
+
+    cache = None
+    if flags.no_cache:
+        code = compile(content, flags.file, "exec")
+    else:
+        cache = ProgramCache(flags.cache_dir)
+        code = cache.compile(content, flags.file)
+
+    if flags.o:
+        with open(flags.o, "w") as f:
+            dis.dis(code, file=f)
+
     loop = ExecutionLoop(
-        dis.Bytecode(content),
+        code,
         name="MainLoop",
         co_globals={"__name__": "__main__", "__file__": flags.file},
     )
 
     if flags.debug:
-        with suppress(Exception):
-            if "." in flags.debug_step:
-                flags.debug_step = float(flags.debug_step)
-            else:
-                flags.debug_step = int(flags.debug_step)
-
         loop.on_notify("INSTRUCTION", debug_visual(flags.debug_step))
+
+    profiler = None
+    if flags.profile:
+        profiler = Profiler()
+        loop.on_notify("INSTRUCTION", profiler)
+
+    calls = None
+    if flags.trace_calls:
+        calls = CallTracer()
+        calls.subscribe(loop)
+
+    tracer = None
+    if flags.trace:
+        tracer = Tracer(flags.trace_size)
+        loop.on_notify("INSTRUCTION", tracer)
     try:
         with currentLoop(loop):
             loop.run()
-    except Exception:
-        critical_logger(loop)
+    except (Exception, KeyboardInterrupt) as error:
+        if isinstance(error, Exception):
+            critical_logger(loop)
+        if tracer:
+            tracer.dump(flags.trace, error)
+            print(f"last instructions dumped in {flags.trace}", file=sys.stderr)
         raise
+    finally:
+        if cache:
+            # the code objects prepared by the run
+            cache.save()
+        if flags.cache_stats:
+            print(LOAD_CACHE, file=sys.stderr)
+        if profiler:
+            profiler.stop()
+            profiler.report(file=sys.stderr)
+            profiler.dump_json(flags.profile)
+        if calls:
+            calls.stop()
+            folded = calls.dump(flags.trace_calls)
+            print(
+                f"{len(calls.events) // 2} calls traced in {flags.trace_calls},"
+                f" folded stacks in {folded}",
+                file=sys.stderr,
+            )
+
+
+def batch(flags):
+    report = run_batch(
+        flags.batch,
+        workers=flags.workers,
+        cache_dir=flags.cache_dir,
+        use_cache=not flags.no_cache,
+        optimize=not flags.no_optimize,
+        prefetch=flags.generator_prefetch,
+        level=flags.level,
+    )
+    print(
+        f"{len(report['scripts'])} scripts, {report['failed']} failed,"
+        f" {report['wall_s']:.2f}s on {report['workers']} workers",
+        file=sys.stderr,
+    )
+    if flags.report:
+        with open(flags.report, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    sys.exit(1 if report["failed"] else 0)
 
 
 if __name__ == "__main__":
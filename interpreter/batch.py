@@ -0,0 +1,128 @@
+"""
+run the scripts of a directory on a pool of worker processes, each worker
+imports the interpreter once and keeps its caches warm between the scripts
+"""
+
+import contextlib
+import io
+import logging
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+
+from interpreter import generator, optimizer
+from interpreter.cache import ProgramCache
+from interpreter.debug import currentLoop
+from interpreter.loop import ExecutionLoop
+
+# on-disk cache of the worker, None without cache, see `init_worker`
+_cache = None
+
+
+def init_worker(cache_dir, use_cache, optimize, prefetch, level):
+    global _cache
+    optimizer.ENABLED = optimize
+    generator.PREFETCH = prefetch
+    logging.getLogger().setLevel(level)
+    _cache = ProgramCache(cache_dir) if use_cache else None
+
+
+def _exit_status(code):
+    # same as the status of a process ended by `sys.exit(code)`
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def run_script(path):
+    """run the script `path` in this process, its entry in the report"""
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    # the logs of the loops go with the output, as in `interpreter.py`
+    handler = logging.StreamHandler(stdout)
+    logging.getLogger().addHandler(handler)
+
+    status = 0
+    compile_s = run_s = 0.0
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                with open(path, "rb") as f:
+                    source = f.read()
+                if _cache is None:
+                    code = compile(source, path, "exec")
+                else:
+                    code = _cache.compile(source, path)
+                compile_s = time.perf_counter() - start
+
+                loop = ExecutionLoop(
+                    code,
+                    name="MainLoop",
+                    co_globals={"__name__": "__main__", "__file__": path},
+                )
+                with currentLoop(loop):
+                    loop.run()
+            except SystemExit as exit:
+                status = _exit_status(exit.code)
+            except Exception:
+                traceback.print_exc()
+                status = 1
+            run_s = time.perf_counter() - start - compile_s
+    finally:
+        logging.getLogger().removeHandler(handler)
+        if _cache is not None:
+            _cache.save()
+
+    return {
+        "path": path,
+        "status": status,
+        "stdout": stdout.getvalue(),
+        "stderr": stderr.getvalue(),
+        "compile_s": compile_s,
+        "run_s": run_s,
+        "worker": os.getpid(),
+    }
+
+
+def scripts(directory):
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.endswith(".py")
+    )
+
+
+def run_batch(
+    directory,
+    workers=None,
+    cache_dir=None,
+    use_cache=True,
+    optimize=True,
+    prefetch=0,
+    level=logging.WARNING,
+):
+    """run the scripts of `directory` on `workers` processes, the json report"""
+    workers = workers or os.cpu_count()
+    paths = scripts(directory)
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_worker,
+        initargs=(cache_dir, use_cache, optimize, prefetch, level),
+    ) as pool:
+        results = list(pool.map(run_script, paths))
+
+    return {
+        "directory": directory,
+        "workers": workers,
+        "wall_s": time.perf_counter() - start,
+        "failed": sum(result["status"] != 0 for result in results),
+        "scripts": results,
+    }
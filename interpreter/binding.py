@@ -0,0 +1,182 @@
+from inspect import CO_VARARGS, CO_VARKEYWORDS
+
+
+class _Missing:
+    def __repr__(self):
+        return "MISSING"
+
+
+MISSING = _Missing()
+
+
+def _names(names):
+    # the list of CPython: 'a', 'a' and 'b', 'a', 'b', and 'c'
+    names = [repr(name) for name in names]
+    if len(names) == 1:
+        return names[0]
+    if len(names) == 2:
+        return f"{names[0]} and {names[1]}"
+    return f"{', '.join(names[:-1])}, and {names[-1]}"
+
+
+def _plural(count, word):
+    return f"{word}{'s' * (count != 1)}"
+
+
+class BindingPlan:
+    """
+    how the arguments of a call fill the fast locals of a function, computed
+    once from the code object and the defaults given to MAKE_FUNCTION
+
+    the slots are the parameters in co_varnames order: positionals,
+    keyword-only, then `*args` and `**kwargs`
+    """
+
+    __slots__ = (
+        "name",
+        "argcount",
+        "kwonlycount",
+        "names",
+        "slots",
+        "defaults",
+        "kwdefaults",
+        "varargs",
+        "varkw",
+        "simple",
+    )
+
+    def __init__(self, code, defaults=None, kwdefaults=None):
+        # the errors name the function like CPython, by its qualified name
+        self.name = code.co_qualname
+        self.argcount = code.co_argcount
+        self.kwonlycount = code.co_kwonlyargcount
+        count = self.argcount + self.kwonlycount
+        self.names = code.co_varnames[:count]
+        # slot of the names a keyword can fill, positional-only ones can't
+        self.slots = {
+            name: index
+            for index, name in enumerate(self.names)
+            if index >= code.co_posonlyargcount
+        }
+        self.defaults = defaults or ()
+        self.kwdefaults = kwdefaults or {}
+
+        # slots of `*args` and `**kwargs`, None without them
+        self.varargs = self.varkw = None
+        if code.co_flags & CO_VARARGS:
+            self.varargs = count
+            count += 1
+        if code.co_flags & CO_VARKEYWORDS:
+            self.varkw = count
+
+        # only positional parameters, the plan of most functions
+        self.simple = not (
+            self.kwonlycount or code.co_flags & (CO_VARARGS | CO_VARKEYWORDS)
+        )
+
+    def bind(self, args, kw_names=()):
+        """
+        values of the parameters slots for a call, the values of the keyword
+        arguments are at the end of `args`, named by `kw_names`
+        """
+        if self.simple and not kw_names and len(args) == self.argcount:
+            return args
+        return self.bind_slow(args, kw_names)
+
+    def bind_slow(self, args, kw_names):
+        argcount = self.argcount
+        positionals = len(args) - len(kw_names)
+        size = argcount + self.kwonlycount
+        values = [MISSING] * (
+            size + (self.varargs is not None) + (self.varkw is not None)
+        )
+
+        given = min(positionals, argcount)
+        values[:given] = args[:given]
+        if self.varargs is not None:
+            values[self.varargs] = tuple(args[argcount:positionals])
+
+        extra = {}
+        for name, value in zip(kw_names, args[positionals:]):
+            slot = self.slots.get(name)
+            if slot is None:
+                if self.varkw is None:
+                    raise self.unexpected_keyword(name, kw_names)
+                extra[name] = value
+            elif values[slot] is not MISSING:
+                raise TypeError(
+                    f"{self.name}() got multiple values for argument {name!r}"
+                )
+            else:
+                values[slot] = value
+        if self.varkw is not None:
+            values[self.varkw] = extra
+
+        if positionals > argcount and self.varargs is None:
+            raise self.too_many_positional(positionals, values)
+
+        # the defaults fill the last positional parameters
+        first = argcount - len(self.defaults)
+        missing = []
+        for slot in range(given, argcount):
+            if values[slot] is MISSING:
+                if slot >= first:
+                    values[slot] = self.defaults[slot - first]
+                else:
+                    missing.append(self.names[slot])
+        if missing:
+            raise TypeError(
+                f"{self.name}() missing {len(missing)} required positional"
+                f" {_plural(len(missing), 'argument')}: {_names(missing)}"
+            )
+
+        for slot in range(argcount, size):
+            if values[slot] is MISSING:
+                name = self.names[slot]
+                if name not in self.kwdefaults:
+                    missing.append(name)
+                else:
+                    values[slot] = self.kwdefaults[name]
+        if missing:
+            raise TypeError(
+                f"{self.name}() missing {len(missing)} required keyword-only"
+                f" {_plural(len(missing), 'argument')}: {_names(missing)}"
+            )
+        return values
+
+    def too_many_positional(self, given, values):
+        """the TypeError of CPython for a call given `given` positional arguments"""
+        argcount = self.argcount
+        if self.defaults:
+            first = argcount - len(self.defaults)
+            takes = f"from {first} to {argcount} positional arguments"
+        else:
+            takes = f"{argcount} {_plural(argcount, 'positional argument')}"
+        kwonly = sum(
+            values[slot] is not MISSING
+            for slot in range(argcount, argcount + self.kwonlycount)
+        )
+        if kwonly:
+            return TypeError(
+                f"{self.name}() takes {takes} but {given}"
+                f" {_plural(given, 'positional argument')} (and {kwonly}"
+                f" {_plural(kwonly, 'keyword-only argument')}) were given"
+            )
+        return TypeError(
+            f"{self.name}() takes {takes} but {given}"
+            f" {'was' if given == 1 else 'were'} given"
+        )
+
+    def unexpected_keyword(self, name, kw_names):
+        # the positional-only parameters given by keyword are reported first
+        positional_only = [
+            keyword
+            for keyword in kw_names
+            if keyword in self.names and keyword not in self.slots
+        ]
+        if positional_only:
+            return TypeError(
+                f"{self.name}() got some positional-only arguments passed as"
+                f" keyword arguments: '{', '.join(positional_only)}'"
+            )
+        return TypeError(f"{self.name}() got an unexpected keyword argument {name!r}")
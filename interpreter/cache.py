@@ -0,0 +1,194 @@
+import dis
+import hashlib
+import logging
+import marshal
+import os
+import tempfile
+from importlib.util import MAGIC_NUMBER
+from types import CodeType
+
+from interpreter import optimizer
+from interpreter.code import CODE_CACHE, PreparedCode
+
+# bump when the entries or the prepared instructions change
+FORMAT = 2
+
+logger = logging.getLogger("cache")
+
+
+def default_directory():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "python-interpreter")
+
+
+def walk(code, codes=None):
+    """`code` and the code objects nested in its constants, depth first"""
+    if codes is None:
+        codes = []
+    codes.append(code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            walk(const, codes)
+    return codes
+
+
+# argval marshal can't save, computed back from the arg when loaded
+_ARGVALS = {
+    dis.opmap["FORMAT_VALUE"]: lambda arg: (
+        dis.FORMAT_VALUE_CONVERTERS[arg & 0x03][0],
+        bool(arg & 0x04),
+    ),
+}
+# `ref` of the instructions whose argval is in _ARGVALS
+_COMPUTED = -2
+
+
+def _dump(inst, index):
+    # the nested code objects are saved once, with the module,
+    # the instructions loading them keep their index in `walk`
+    argval = inst.argval
+    ref = -1
+    if isinstance(argval, CodeType):
+        argval, ref = None, index[id(argval)]
+    elif inst.opcode in _ARGVALS:
+        argval, ref = None, _COMPUTED
+    return (*inst[:3], argval, *inst[4:8], tuple(inst.positions), ref)
+
+
+def _load(insts, codes):
+    make = dis.Instruction._make
+    positions = dis.Positions._make
+    loaded = []
+    for fields in insts:
+        ref = fields[9]
+        if ref == -1:
+            argval = fields[3]
+        elif ref == _COMPUTED:
+            argval = _ARGVALS[fields[1]](fields[2])
+        else:
+            argval = codes[ref]
+        loaded.append(make((*fields[:3], argval, *fields[4:8], positions(fields[8]))))
+    return tuple(loaded)
+
+
+class ProgramCache:
+    """
+    prepared programs on disk keyed by the hash of their source: the module
+    code object and the optimized instructions of the code objects the runs
+    prepared, saved with marshal; the functions never called are prepared
+    when they are, not when the program is cached
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or default_directory()
+        self.hits = 0
+        self.misses = 0
+        # path -> (module code object, indexes in `walk` of the saved entries)
+        self._programs = {}
+
+    def key(self, source, filename):
+        digest = hashlib.sha256()
+        settings = (
+            FORMAT,
+            optimizer.ENABLED,
+            optimizer.MAX_INT_BITS,
+            optimizer.MAX_SIZE,
+        )
+        for part in (MAGIC_NUMBER, repr(settings).encode(), filename.encode(), source):
+            digest.update(part)
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.marshal")
+
+    def compile(self, source, filename):
+        """
+        module code object of `source`, the code objects saved with it are
+        prepared in CODE_CACHE when it was in the cache, see `save` for the
+        ones prepared by this run
+        """
+        if isinstance(source, str):
+            source = source.encode()
+        path = self.path(self.key(source, filename))
+
+        loaded = self.load(path)
+        if loaded is not None:
+            self.hits += 1
+            self._programs[path] = loaded
+            return loaded[0]
+
+        self.misses += 1
+        code = compile(source, filename, "exec")
+        # the code object alone, the run may not end
+        self.write(path, code, ())
+        self._programs[path] = (code, frozenset())
+        return code
+
+    def load(self, path):
+        try:
+            with open(path, "rb") as f:
+                code, entries = marshal.loads(f.read())
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, ValueError, TypeError) as error:
+            logger.warning("ignore the cache entry %s: %s", path, error)
+            return None
+
+        codes = walk(code)
+        for index, removed, insts in entries:
+            CODE_CACHE.add(PreparedCode(codes[index], _load(insts, codes), removed))
+        return code, frozenset(index for index, _, _ in entries)
+
+    def save(self):
+        """
+        save again the programs compiled since the last call when their run
+        prepared code objects not saved yet, called after the runs
+        """
+        programs, self._programs = self._programs, {}
+        for path, (code, saved) in programs.items():
+            codes = walk(code)
+            prepared = {}
+            for i, nested in enumerate(codes):
+                found = CODE_CACHE.peek(nested)
+                if found is not None:
+                    prepared[i] = found
+            if prepared.keys() <= saved:
+                continue
+
+            index = {id(nested): i for i, nested in enumerate(codes)}
+            entries = []
+            for i, found in prepared.items():
+                entry = (
+                    i,
+                    found.removed,
+                    tuple(_dump(inst, index) for inst in found.insts),
+                )
+                try:
+                    marshal.dumps(entry)
+                except ValueError as error:
+                    # a folded constant marshal can't save, prepared again when run
+                    logger.info("can't cache %s: %s", found.name, error)
+                    continue
+                entries.append(entry)
+            self.write(path, code, tuple(entries))
+
+    def write(self, path, code, entries):
+        data = marshal.dumps((code, entries))
+        # written aside then renamed, concurrent runs never read half an entry
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as error:
+            logger.warning("can't write the cache entry %s: %s", path, error)
+
+    def __repr__(self):
+        return (
+            f"ProgramCache(directory={self.directory!r}"
+            f" hits={self.hits} misses={self.misses})"
+        )
@@ -0,0 +1,166 @@
+"""
+hooks tracing the calls of a program: the interpreted calls, the native
+calls made by CALL and the generators resumes are enter/exit events in the
+chrome trace event format (chrome://tracing, ui.perfetto.dev), and their
+self time is written as folded stacks for the flamegraph tools
+"""
+
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from interpreter.dispatch import OPMAP
+from interpreter.loop import Function
+from interpreter.stack import NULL
+
+_CALL = OPMAP["CALL"]
+_CALL_FUNCTION_EX = OPMAP["CALL_FUNCTION_EX"]
+
+
+def _native_name(func):
+    name = getattr(func, "__qualname__", None)
+    if not isinstance(name, str):
+        name = f"{type(func).__qualname__} object"
+    module = getattr(func, "__module__", None)
+    if isinstance(module, str) and module != "builtins":
+        return f"{module}.{name}"
+    return name
+
+
+class CallTracer:
+    """
+    the calls are closed by the RETURN and YIELD events of their loop, or by
+    the next instruction of the loop making them: the native calls, and the
+    calls left by an exception
+    """
+
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        self.origin = clock()
+        self.pid = os.getpid()
+        self.events = []
+        # self time in ns of each stack of calls, names joined by ";"
+        self.folded = defaultdict(int)
+        # open calls, innermost last: [loop, start, time of the children, stack]
+        # the loop is the one running the call, None for a native call
+        self.stack = []
+        self.open = set()
+        self.current = None
+
+    def subscribe(self, loop):
+        loop.on_notify("INSTRUCTION", self.instruction)
+        loop.on_notify("CALL", self.call)
+        loop.on_notify("RESUME", self.resume)
+        loop.on_notify("RETURN", self.leave)
+        loop.on_notify("YIELD", self.leave)
+
+    def enter(self, loop, name, category, args):
+        now = self.clock()
+        stack = f"{self.stack[-1][3]};{name}" if self.stack else name
+        self.stack.append([loop, now, 0, stack])
+        if loop is not None:
+            self.open.add(loop)
+        self.current = loop
+        self.events.append(
+            {
+                "name": name,
+                "cat": category,
+                "ph": "B",
+                "ts": (now - self.origin) / 1000,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+                "args": args,
+            }
+        )
+
+    def exit(self):
+        now = self.clock()
+        loop, start, children, stack = self.stack.pop()
+        self.open.discard(loop)
+        elapsed = now - start
+        self.folded[stack] += elapsed - children
+        if self.stack:
+            self.stack[-1][2] += elapsed
+            self.current = self.stack[-1][0]
+        else:
+            self.current = None
+        self.events.append(
+            {
+                "ph": "E",
+                "ts": (now - self.origin) / 1000,
+                "pid": self.pid,
+                "tid": threading.get_ident(),
+            }
+        )
+
+    def enter_loop(self, loop, category):
+        code = loop.code.code
+        self.enter(
+            loop,
+            code.co_qualname,
+            category,
+            {"file": code.co_filename, "line": code.co_firstlineno},
+        )
+
+    def instruction(self, loop):
+        if loop is not self.current:
+            if loop in self.open:
+                # back in the loop, the calls it made returned
+                while self.stack[-1][0] is not loop:
+                    self.exit()
+            elif not self.stack:
+                # the module
+                self.enter_loop(loop, "module")
+
+        frame = loop.frame
+        inst = frame.insts[frame.pointer - 1]
+        if inst.opcode == _CALL:
+            stack = loop.stack
+            start = len(stack) - inst.arg
+            func = stack[start - 1] if stack[start - 2] is NULL else stack[start - 2]
+        elif inst.opcode == _CALL_FUNCTION_EX:
+            func = loop.stack[-2 - (inst.arg & 0x01)]
+        else:
+            return
+        # the interpreted calls are entered by the CALL event of their loop
+        if type(func) is not Function:
+            self.enter(
+                None,
+                _native_name(func),
+                "native",
+                {
+                    "file": loop.code.code.co_filename,
+                    "line": inst.positions.lineno if inst.positions else None,
+                },
+            )
+
+    def call(self, loop):
+        self.enter_loop(loop, "call")
+
+    def resume(self, loop):
+        self.enter_loop(loop, "resume")
+
+    def leave(self, loop):
+        if loop in self.open:
+            while self.stack[-1][0] is not loop:
+                self.exit()
+            self.exit()
+
+    def stop(self):
+        """close the calls still open, at the end of the program or on a crash"""
+        while self.stack:
+            self.exit()
+
+    def dump(self, path):
+        """write the trace events in `path`, the folded stacks next to it"""
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms"}, f)
+        folded = f"{os.path.splitext(path)[0]}.folded"
+        with open(folded, "w") as f:
+            for stack, elapsed in sorted(self.folded.items()):
+                # microseconds, the flamegraph tools want integers
+                if elapsed >= 1000:
+                    print(stack, elapsed // 1000, file=f)
+        return folded
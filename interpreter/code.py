@@ -0,0 +1,149 @@
+import dis
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+from interpreter.optimizer import optimize
+from interpreter.stack import UNBOUND
+from interpreter.superinstructions import fuse
+
+
+def jump_table(insts):
+    """map the index of each jump instruction of `insts` to the index of its target"""
+    offsets = [inst.offset for inst in insts]
+
+    table = [None] * len(insts)
+    for index, inst in enumerate(insts):
+        if inst.opcode in dis.hasjrel:
+            # dis resolve the cache entries and the direction of the jump
+            # in argval, a target falling between two instructions
+            # land on the following one
+            table[index] = bisect_left(offsets, inst.argval)
+    return tuple(table)
+
+
+def handler_table(code, insts):
+    """
+    map the index of each instruction of `insts` to its exception handler:
+    (index of the target, stack depth, push the offset), None outside the
+    try blocks, None for a code without exception table
+    """
+    if not code.co_exceptiontable:
+        return None
+    offsets = [inst.offset for inst in insts]
+
+    table = [None] * len(insts)
+    for entry in dis.Bytecode(code).exception_entries:
+        handler = (bisect_left(offsets, entry.target), entry.depth, entry.lasti)
+        start = bisect_left(offsets, entry.start)
+        end = bisect_left(offsets, entry.end)
+        table[start:end] = [handler] * (end - start)
+    return tuple(table)
+
+
+class PreparedCode:
+    """a decoded code object, shared by all the frames running it"""
+
+    __slots__ = (
+        "code",
+        "name",
+        "insts",
+        "fast_insts",
+        "jumps",
+        "handlers",
+        "consts",
+        "stacksize",
+        "unbound",
+        "caches",
+        "counters",
+        "removed",
+    )
+
+    def __init__(self, code, insts=None, removed=0):
+        self.code = code
+        self.name = code.co_qualname
+        if insts is None:
+            decoded = tuple(dis.Bytecode(code))
+            insts = optimize(decoded, self.name)
+            removed = len(decoded) - len(insts)
+        # optimized instructions, given when loaded from interpreter/cache.py
+        self.insts = insts
+        # instructions dropped by the optimizer
+        self.removed = removed
+        # executed by the hook-free loop, the hooks see the original instructions,
+        # superinstructions and specialized instructions are written here
+        self.fast_insts = fuse(self.insts)
+        self.jumps = jump_table(self.insts)
+        self.handlers = handler_table(code, self.insts)
+        self.consts = code.co_consts
+        self.stacksize = code.co_stacksize
+        # fast locals of a new frame, completed by the arguments
+        self.unbound = (UNBOUND,) * code.co_nlocals
+        # inline caches of the name loads, indexed like `insts`
+        self.caches = [None] * len(self.insts)
+        # executions of the adaptive instructions, see interpreter/specialize.py
+        self.counters = [0] * len(self.insts)
+
+    def __repr__(self):
+        return f"<PreparedCode name={self.name}>"
+
+
+class CodeCache:
+    """process wide LRU cache of `PreparedCode` keyed by code object"""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        # keyed by id, the entry keeps the code object alive
+        # so the id can't be reused while it's cached
+        self._entries = OrderedDict()
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, code):
+        key = id(code)
+        prepared = self._entries.get(key)
+        if prepared is not None:
+            self.hits += 1
+            try:
+                self._entries.move_to_end(key)
+            except KeyError:
+                # evicted by another thread meanwhile, still valid
+                pass
+            return prepared
+
+        # the threads preparing the same code share the first PreparedCode
+        with self._lock:
+            prepared = self._entries.get(key)
+            if prepared is None:
+                self.misses += 1
+                prepared = PreparedCode(code)
+                self.add(prepared)
+        return prepared
+
+    def peek(self, code):
+        """the `PreparedCode` of `code` when it was prepared, None otherwise"""
+        prepared = self._entries.get(id(code))
+        if prepared is not None and prepared.code is code:
+            return prepared
+        return None
+
+    def add(self, prepared):
+        with self._lock:
+            self._entries[id(prepared.code)] = prepared
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+CODE_CACHE = CodeCache()
+
+
+def prepare(code):
+    return CODE_CACHE.get(code)
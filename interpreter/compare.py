@@ -1,3 +1,4 @@
+import operator
 from enum import UNIQUE, IntEnum, auto, verify
 
 
@@ -19,3 +20,13 @@ COMPARES = {
     INSTRUCTION.EQUAL: lambda a, b: a == b,
     INSTRUCTION.NOT_EQUAL: lambda a, b: a != b,
 }
+
+# C implementations used by the specialized instructions
+FUNCTIONS = {
+    INSTRUCTION.LESS: operator.lt,
+    INSTRUCTION.LESS_EQUAL: operator.le,
+    INSTRUCTION.UPPER: operator.gt,
+    INSTRUCTION.UPPER_EQUAL: operator.ge,
+    INSTRUCTION.EQUAL: operator.eq,
+    INSTRUCTION.NOT_EQUAL: operator.ne,
+}
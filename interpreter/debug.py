@@ -1,7 +1,10 @@
 import os
 import time
+from contextvars import ContextVar
 from functools import partial
 
+from interpreter.stack import UNBOUND
+
 
 def _format_dict(dtc, name):
     if not dtc:
@@ -25,6 +28,16 @@ def _format_list(lst, name):
     print("]")
 
 
+def fast_locals(loop):
+    """names and values of the bound fast locals of `loop`, built when asked"""
+    names = loop.code.code.co_varnames
+    return {
+        name: value
+        for name, value in zip(names, loop.fastlocals or ())
+        if value is not UNBOUND
+    }
+
+
 def debug_visual(loop, step=None):
     if isinstance(loop, (int, float, str)):
         return partial(debug_visual, step=loop)
@@ -32,15 +45,15 @@ def debug_visual(loop, step=None):
     os.system("clear")
 
     print(f"Loop[{loop.name}]")
-    print(f"pointer: {loop.pointer}")
-    print(f"instruction: {loop.inst.opname}")
+    print(f"pointer: {loop.frame.pointer - 1}")
+    print(f"instruction: {loop.frame.actual.opname}")
 
-    _format_list(reversed(loop.stack), "Stack")
+    _format_list(reversed(loop.stack), f"Stack({loop.stack.size})")
     _format_dict(loop.co_globals, "CoGlobals")
-    _format_dict(loop.co_locals, "CoLocals")
-    _format_dict(loop.co_names, "CoNames")
+    if loop.co_names is not loop.co_globals:
+        _format_dict(loop.co_names, "CoNames")
     _format_list(loop.co_consts, "CoConst")
-    _format_dict(loop.co_varnames, "CoVarnames")
+    _format_dict(fast_locals(loop), "CoVarnames")
 
     if isinstance(step, str):
         input()
@@ -50,37 +63,64 @@ def debug_visual(loop, step=None):
 
 def critical_logger(loop):
     loop.logger.critical(f"Loop[{loop.name}]")
-    loop.logger.critical(f"\tpointer: {len(loop.insts) - loop.pointer}")
-    loop.logger.critical(f"\topname: {loop.inst.opname}")
-    loop.logger.critical(f"\tinst: {loop.inst}")
+    loop.logger.critical(f"\tpointer: {loop.frame.pointer - 1}")
+    loop.logger.critical(f"\topname: {loop.frame.actual.opname}")
+    loop.logger.critical(f"\tinst: {loop.frame.actual}")
     loop.logger.critical(f"\tstack: {loop.stack}")
     loop.logger.critical(f"\tco_globals: {loop.co_globals}")
-    loop.logger.critical(f"\tco_locals: {loop.co_locals}")
-    loop.logger.critical(f"\tco_names: {loop.co_names}")
+    if loop.co_names is not loop.co_globals:
+        loop.logger.critical(f"\tco_names: {loop.co_names}")
     loop.logger.critical(f"\tco_consts: {loop.co_consts}")
-    loop.logger.critical(f"\tco_varnames: {loop.co_varnames}\n")
+    loop.logger.critical(f"\tco_varnames: {fast_locals(loop)}\n")
 
 
-_current_loop = []
+# loops entered from python in the thread/asyncio task, innermost first as
+# a linked list of (loop, parent) pairs: pushing and popping never copy
+# the stack; the interpreted calls run in place by a loop are followed
+# from its `innermost` loop through their `caller`
+_current_loop = ContextVar("current_loop", default=None)
 
 
 class currentLoop:
     def __init__(self, loop):
         self._loop = loop
+        self._token = None
 
     def __enter__(self):
-        _current_loop.append(self._loop)
+        self._token = _current_loop.set((self._loop, _current_loop.get()))
 
     def __exit__(self, exec_t, exec_v, exec_tb):
-        if exec_v:
-            raise
-        global _current_loop
-        del _current_loop[-1]
+        _current_loop.reset(self._token)
+
+    # without the context manager, for the paths run on each call/resume
+    @staticmethod
+    def push(loop):
+        return _current_loop.set((loop, _current_loop.get()))
+
+    @staticmethod
+    def pop(token=None):
+        if token is not None:
+            _current_loop.reset(token)
+        else:
+            _current_loop.set(_current_loop.get()[1])
 
     @staticmethod
     def get():
-        return _current_loop[-1]
+        entry = _current_loop.get()
+        if entry is None:
+            raise IndexError("no loop running")
+        return entry[0].innermost
 
     @staticmethod
     def getAll():
-        return _current_loop
+        loops = []
+        entry = _current_loop.get()
+        while entry is not None:
+            loop = entry[0].innermost
+            while loop is not entry[0]:
+                loops.append(loop)
+                loop = loop.caller
+            loops.append(loop)
+            entry = entry[1]
+        loops.reverse()
+        return loops
@@ -0,0 +1,41 @@
+import dis
+
+OPMAP = dict(dis.opmap)
+# opcodes of the instructions only known by the interpreter -> opcodes of
+# the instructions they execute, see `define`
+PARTS = {}
+
+
+def opcode(*opnames):
+    """mark the decorated method as the handler of the instructions `opnames`"""
+
+    def decorator(func):
+        func.opnames = opnames
+        return func
+
+    return decorator
+
+
+def define(opname, *parts):
+    """
+    allocate an opcode for an instruction only known by the interpreter,
+    executing the instructions `parts`: the generic instruction of a
+    specialized one, the pair of a superinstruction
+    """
+    if opname not in OPMAP:
+        OPMAP[opname] = max(OPMAP.values()) + 1
+    PARTS[OPMAP[opname]] = tuple(OPMAP[part] for part in parts)
+    return OPMAP[opname]
+
+
+def dispatch_table(cls, default):
+    """
+    build the list of handlers of `cls` indexed by opcode,
+    instructions without handler are dispatched to `default`
+    """
+    table = [default] * (max(OPMAP.values()) + 1)
+    for klass in reversed(cls.__mro__):
+        for attr in vars(klass).values():
+            for opname in getattr(attr, "opnames", ()):
+                table[OPMAP[opname]] = attr
+    return table
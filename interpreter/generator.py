@@ -1,22 +1,289 @@
+import dis
+from collections import deque
+
 from interpreter.debug import currentLoop
 
+# yields run ahead by the generators only consumed by a for loop, 0 to
+# disable, the body runs before the loop asks the values so its side effects
+# too, see `Generator.run_ahead`
+PREFETCH = 0
+
 
 class Generator:
     def __init__(self, loop):
         self.loop = loop
+        self.code = loop.code
         self.loop.end = self.end
+        # yields run by `fill`, none until `run_ahead`
+        self.prefetch = 0
+        # values run ahead, and the exception raised after them
+        self.buffer = deque()
+        self.error = None
+        # resumed by another thread, or by itself
+        self.running = False
+        # returned or raised, the loop can't run anymore
+        self.finished = False
+
+        self.__name__ = loop.code.code.co_name
+        self.__qualname__ = loop.code.name
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.__qualname__}>"
 
     def end(self, value):
-        # when instruction RETURN_CONST or RETURN_VALUE is called, raise a stopIteration
-        raise StopIteration
+        # when instruction RETURN_CONST or RETURN_VALUE is called, the loop
+        # returns the value, raised in a StopIteration by `step`
+        self.finished = True
+        return value
 
     def __iter__(self):
         return self
 
+    def step(self, run, *args):
+        """run the body with `run` up to its next yield"""
+        if self.running:
+            raise ValueError("generator already executing")
+        if self.finished:
+            raise StopIteration
+        self.running = True
+        notify = self.loop._notify
+        if notify.active:
+            notify.emit("RESUME", self.loop)
+        token = currentLoop.push(self.loop)
+        try:
+            value = run(*args)
+        except BaseException:
+            self.finished = True
+            raise
+        finally:
+            currentLoop.pop(token)
+            self.running = False
+        if self.finished:
+            raise StopIteration(value)
+        return value
+
+    def resume(self, value):
+        """run the body from its last yield, `value` is the result of the yield"""
+        return self.step(self.advance, value)
+
+    def advance(self, value):
+        loop = self.loop
+        loop.stack.append(value)
+        return loop.run()
+
+    def run_ahead(self):
+        """
+        called by GET_ITER when the stack of a for loop holds the only
+        reference on the generator: nothing else can `send` it a value
+        or see its progress, the loop asks its values with `next` only
+        """
+        # the hooks must see the instructions when the consumer asks them
+        if not self.loop._notify.active:
+            self.prefetch = PREFETCH
+
+    def fill(self):
+        """run the generator ahead up to `prefetch` yields"""
+        loop = self.loop
+        stack = loop.stack
+        run = loop.run
+        append = self.buffer.append
+        if self.running:
+            raise ValueError("generator already executing")
+        if self.finished:
+            raise StopIteration
+        self.running = True
+        token = currentLoop.push(loop)
+        try:
+            for _ in range(self.prefetch):
+                stack.append(None)
+                value = run()
+                if self.finished:
+                    self.error = StopIteration(value)
+                    break
+                append(value)
+        except Exception as error:
+            # raised when the consumer reach it
+            self.finished = True
+            self.error = error
+        finally:
+            currentLoop.pop(token)
+            self.running = False
+
     def send(self, value):
-        with currentLoop(self.loop):
-            self.loop.stack.append(value)
-            return self.loop.run()
+        if value is None:
+            return self.__next__()
+        if self.buffer or self.error is not None:
+            raise RuntimeError("can't send a value to a generator running ahead")
+        # the sent values must reach the body, no more batches
+        self.prefetch = 0
+        return self.resume(value)
+
+    def __next__(self):
+        if self.buffer:
+            return self.buffer.popleft()
+        if self.error is not None:
+            error, self.error = self.error, None
+            raise error
+        if not self.prefetch:
+            return self.resume(None)
+
+        self.fill()
+        if self.buffer:
+            return self.buffer.popleft()
+        error, self.error = self.error, None
+        raise error
+
+    def throw(self, typ, val=None, tb=None):
+        """raise an exception where the generator is suspended"""
+        error = _exception(typ, val, tb)
+        if self.buffer or self.error is not None:
+            raise RuntimeError("can't throw into a generator running ahead")
+        self.prefetch = 0
+        if self.finished:
+            raise error
+
+        # suspended in a `yield from` or an `await`, the receiver gets
+        # the exception first, see SEND
+        loop = self.loop
+        insts = loop.frame.insts
+        pointer = loop.frame.pointer
+        if pointer > 1 and insts[pointer - 2].opcode == _SEND:
+            receiver = loop.stack[-1]
+            try:
+                if isinstance(error, GeneratorExit):
+                    close = getattr(receiver, "close", None)
+                    if close is not None:
+                        close()
+                else:
+                    throw = getattr(receiver, "throw", None)
+                    if throw is not None:
+                        return throw(error)
+            except BaseException as raised:
+                # the StopIteration of the receiver is handled by CLEANUP_THROW
+                error = raised
+        return self.step(loop.throw, error)
+
+    def close(self):
+        self.buffer.clear()
+        self.error = None
+        if self.finished:
+            return
+        try:
+            self.throw(GeneratorExit)
+        except (GeneratorExit, StopIteration):
+            return
+        raise RuntimeError("generator ignored GeneratorExit")
+
+
+class Coroutine(Generator):
+    """an `async def` call, awaited by the interpreted coroutines or run by asyncio"""
+
+    # not an iterator, see GET_YIELD_FROM_ITER
+    __iter__ = None
+
+    def __await__(self):
+        return self
+
+
+class AsyncWrapped:
+    """value of a `yield` in an async generator, the other values come from `await`"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class AsyncGenerator(Generator):
+    """an async generator call, each step is an awaitable, see AsyncStep"""
+
+    __iter__ = None
+
+    def __aiter__(self):
+        return self
+
+    def __anext__(self):
+        return AsyncStep(self, self.send, None)
+
+    def asend(self, value):
+        return AsyncStep(self, self.send, value)
+
+    def athrow(self, typ, val=None, tb=None):
+        return AsyncStep(self, self.throw, typ, val, tb)
+
+    def aclose(self):
+        return AsyncStep(self, self.throw, GeneratorExit, closing=True)
+
+
+class AsyncStep:
+    """
+    awaitable running an async generator up to its next `yield`, the
+    awaited values go through to the event loop, the yielded one is
+    the result of the step
+    """
+
+    def __init__(self, generator, method, *args, closing=False):
+        self.generator = generator
+        self.method = method
+        self.args = args
+        self.closing = closing
+        self.started = False
+
+    def __await__(self):
+        return self
+
+    def __iter__(self):
+        return self
 
     def __next__(self):
         return self.send(None)
+
+    def send(self, value):
+        if self.started:
+            return self.unwrap(self.generator.send, value)
+        self.started = True
+        return self.unwrap(self.method, *self.args)
+
+    def throw(self, typ, val=None, tb=None):
+        self.started = True
+        return self.unwrap(self.generator.throw, typ, val, tb)
+
+    def close(self):
+        self.started = True
+
+    def unwrap(self, method, *args):
+        try:
+            value = method(*args)
+        except StopIteration:
+            if self.closing:
+                raise
+            raise StopAsyncIteration from None
+        except (GeneratorExit, StopAsyncIteration):
+            if self.closing:
+                raise StopIteration from None
+            raise
+        if type(value) is AsyncWrapped:
+            if self.closing:
+                raise RuntimeError("async generator ignored GeneratorExit")
+            raise StopIteration(value.value)
+        return value
+
+
+def _exception(typ, val=None, tb=None):
+    # the arguments of `throw`, the legacy signature included
+    if isinstance(typ, BaseException):
+        error = typ
+    elif isinstance(val, typ):
+        error = val
+    elif val is None:
+        error = typ()
+    elif isinstance(val, tuple):
+        error = typ(*val)
+    else:
+        error = typ(val)
+    if tb is not None:
+        error = error.with_traceback(tb)
+    return error
+
+
+_SEND = dis.opmap["SEND"]
@@ -0,0 +1,121 @@
+from interpreter.dispatch import OPMAP, PARTS
+
+EVENTS = ("INSTRUCTION", "CALL", "RETURN", "YIELD", "RESUME", "JUMP")
+
+
+class Hooks:
+    """
+    subscribers of the events of a tree of loops, the loops created
+    by a function share the hooks of the loop defining it
+
+    INSTRUCTION subscribers can be limited to some opcodes, the others
+    events are:
+        - CALL: an interpreted function loop is about to run
+        - RETURN: a loop returned
+        - YIELD: a generator loop yielded a value
+        - RESUME: a generator loop is about to run again, see Generator.resume
+        - JUMP: an instruction moved the pointer elsewhere than the next instruction
+
+    the loops keep their fast path for the events and the INSTRUCTION
+    subscribers limited to some opcodes: CALL, RETURN and YIELD are emitted
+    where the driver switches of loop, and the handlers of the subscribed
+    opcodes are wrapped in `dispatch`; the INSTRUCTION subscribers of all
+    the opcodes and the JUMP ones run `ExecutionLoop.execute_notify`
+
+    the loops given to the subscribers are never recycled for another
+    call, see `ExecutionLoop.release`
+    """
+
+    def __init__(self, dispatch):
+        # handlers of the loops without subscriber, see `ExecutionLoop.dispatch`
+        self.base = dispatch
+        # func -> opcodes, None for all instructions
+        self._instructions = {}
+        self._events = {event: () for event in EVENTS if event != "INSTRUCTION"}
+        self.instructions = []
+        self.dispatch = dispatch
+        # any subscriber, CALL/RETURN/YIELD subscribers, execute_notify needed
+        self.active = False
+        self.events = False
+        self.slow = False
+
+    def subscribe(self, event, func, opcodes=None):
+        if event == "INSTRUCTION":
+            if opcodes is not None:
+                opcodes = {OPMAP.get(op, op) for op in opcodes}
+            self._instructions[func] = opcodes
+        elif event in self._events:
+            self._events[event] = (*self._events[event], func)
+        else:
+            raise ValueError(f"Unknown event {event!r}")
+        self._build()
+
+    def unsubscribe(self, event, func):
+        if event == "INSTRUCTION":
+            self._instructions.pop(func, None)
+        else:
+            self._events[event] = tuple(f for f in self._events[event] if f != func)
+        self._build()
+
+    def _build(self):
+        # subscribers of each opcode, empty tuple when there is none
+        table = [[] for _ in range(max(OPMAP.values()) + 1)]
+        for func, opcodes in self._instructions.items():
+            for op, funcs in enumerate(table):
+                if opcodes is None or op in opcodes:
+                    funcs.append(func)
+        self.instructions = [tuple(funcs) for funcs in table]
+
+        events = self._events
+        self.active = bool(self._instructions) or any(events.values())
+        self.events = bool(events["CALL"] or events["RETURN"] or events["YIELD"])
+        self.slow = None in self._instructions.values() or bool(events["JUMP"])
+        self.dispatch = self.base if self.slow else self._wrap()
+
+    def _wrap(self):
+        """`base` with the handlers of the subscribed opcodes wrapped"""
+        instructions = self.instructions
+        if not any(instructions):
+            return self.base
+
+        dispatch = list(self.base)
+        for op, handler in enumerate(self.base):
+            parts = PARTS.get(op, ())
+            if instructions[op]:
+                dispatch[op] = _hooked(handler, instructions[op])
+            elif len(parts) == 1 and instructions[parts[0]]:
+                # a specialized instruction is seen as the generic one
+                dispatch[op] = _hooked(handler, instructions[parts[0]])
+            elif any(instructions[part] for part in parts):
+                dispatch[op] = _split(dispatch)
+        return dispatch
+
+    def emit(self, event, loop):
+        for func in self._events[event]:
+            func(loop)
+
+
+def _hooked(handler, funcs):
+    def hooked(loop, inst):
+        for func in funcs:
+            func(loop)
+        return handler(loop, inst)
+
+    return hooked
+
+
+def _split(dispatch):
+    # a superinstruction holding a subscribed opcode runs its two
+    # instructions apart, each one through `dispatch`
+    def split(loop, inst):
+        frame = loop.frame
+        index = frame.pointer
+        first = frame.insts[index - 1]
+        result = dispatch[first.opcode](loop, first)
+        if result is not None or frame.pointer != index:
+            return result
+        second = frame.insts[index]
+        frame.pointer += 1
+        return dispatch[second.opcode](loop, second)
+
+    return split
@@ -1,45 +1,157 @@
-import dis
+import builtins
 import inspect
 import logging
-from collections import defaultdict, deque
+from inspect import CO_ASYNC_GENERATOR, CO_COROUTINE, CO_ITERABLE_COROUTINE
+from itertools import count
+from types import CoroutineType
 
+from interpreter.binding import BindingPlan
 from interpreter.compare import COMPARES
+from interpreter.code import prepare
 from interpreter.debug import currentLoop
-from interpreter.generator import Generator
+from interpreter.dispatch import OPMAP, dispatch_table, opcode
+from interpreter.generator import AsyncGenerator, AsyncWrapped, Coroutine, Generator
+from interpreter.hooks import Hooks
+from interpreter.namespace import LOAD_CACHE, Namespace, next_version
 from interpreter.operators import OPERATORS
-from interpreter.stack import NULL, Stack
+from interpreter.specialize import (
+    WARMUP,
+    deoptimize,
+    specialize_binary_op,
+    specialize_compare_op,
+)
+from interpreter.stack import NULL, UNBOUND, Frame
+
+
+# result of `ExecutionLoop.execute_budget` when the budget is spent
+PREEMPTED = object()
+
+# loops of the returned calls kept by `ExecutionLoop.release` for reuse,
+# beyond it they are left to the garbage collector
+POOL_SIZE = 64
+
+# numbers of the calls run by the loops, see `ExecutionLoop.setup`
+_serials = count()
 
 
 class ExecutionLoop:
+    # free list of the released loops, shared by all the functions
+    pool = []
+
     def __init__(
         self,
-        insts,
+        code,
         name=None,
         co_globals=None,
-        co_locals=None,
+        co_builtins=None,
         co_names=None,
-        co_consts=None,
         co_varnames=None,
         notify=None,
     ):
-        self.stack = Stack(list(reversed(list(insts))))
+        self.code = prepare(code)
+        self.frame = Frame(self.code)
+        self.stack = self.frame.stack
+        # names of the keyword arguments of the next CALL, set by KW_NAMES
+        self.kwnames = ()
+        # instructions run by `run_slice`, the calls included, and
+        # left in the budget of the slice running
+        self.executed = 0
+        self.remaining = None
+
+        self.setup(name, co_globals, co_builtins, co_names, co_varnames, notify)
+
+    def setup(self, name, co_globals, co_builtins, co_names, co_varnames, notify):
         self.name = name or "NO-SET"
-
-        self.co_builtins = __builtins__
-        self.co_globals = dict(co_globals or {})
-        self.co_locals = dict(co_locals or {})
-        self.co_names = dict(co_names or {})
-        self.co_fastlocalnames = {}
-        self.co_consts = list(co_consts or [])
-        self.co_varnames = dict(enumerate(co_varnames or []))
-
-        self.logger = logging.getLogger(name or "")
-
-        # TODO: remove this shit
-        self._co_kw = deque(maxlen=1)
-
-        self._notify = defaultdict(set)
-        self._notify.update(notify or {})
+        # unique to the call, a recycled loop gets a new one
+        self.serial = next(_serials)
+        # set when a reference on the loop outlive its call (generators)
+        self.escaped = False
+        # loop suspended by the call running in this one, and innermost
+        # call run by the `run` of this one, see `currentLoop.getAll`
+        self.caller = None
+        self.innermost = self
+        # exception handled by an except block, see PUSH_EXC_INFO
+        self.exception = None
+
+        # namespaces are shared, never copied: a function keeps a reference
+        # on the globals and builtins of the module defining it
+        self.co_builtins = builtins.__dict__ if co_builtins is None else co_builtins
+        if not isinstance(co_globals, Namespace):
+            co_globals = Namespace(co_globals or {})
+        self.co_globals = co_globals
+        # at module level the names are the globals
+        if co_names is None:
+            co_names = co_globals
+        elif not isinstance(co_names, Namespace):
+            co_names = Namespace(co_names)
+        self.co_names = co_names
+        self.co_consts = self.code.consts
+        # slots of the fast locals indexed like code.co_varnames, the
+        # arguments `co_varnames` fill the first ones
+        if co_varnames:
+            self.fastlocals = [*co_varnames, *self.code.unbound[len(co_varnames) :]]
+        else:
+            self.fastlocals = list(self.code.unbound)
+
+        # shared with the loops of the functions defined here
+        self._notify = Hooks(self.dispatch) if notify is None else notify
+
+    @classmethod
+    def acquire(
+        cls,
+        code,
+        name=None,
+        co_globals=None,
+        co_builtins=None,
+        co_varnames=None,
+        notify=None,
+    ):
+        """a loop executing `code`, recycled from the pool when there is one"""
+        try:
+            loop = cls.pool.pop()
+        except IndexError:
+            return cls(
+                code,
+                name=name,
+                co_globals=co_globals,
+                co_builtins=co_builtins,
+                co_varnames=co_varnames,
+                notify=notify,
+            )
+        loop.code = prepare(code)
+        loop.frame.reset(loop.code)
+        loop.setup(name, co_globals, co_builtins, None, co_varnames, notify)
+        return loop
+
+    def release(self):
+        """
+        give back the loop of a returned call to the pool, the loops still
+        referenced elsewhere (escaped) are never recycled, nor the ones
+        given to the hooks subscribers, they may keep them
+        """
+        if self.escaped or self._notify.active or len(self.pool) >= POOL_SIZE:
+            return
+        # drop the references on the values of the call
+        self.stack.clear()
+        self.fastlocals = None
+        self.kwnames = ()
+        self.exception = None
+        self.pool.append(self)
+
+    def invoke(self):
+        """run the loop of a call from python, see `Function.enter`"""
+        notify = self._notify
+        if notify.active:
+            notify.emit("CALL", self)
+        with currentLoop(self):
+            result = self.run()
+        # a loop raising is kept for the error report
+        self.release()
+        return result
+
+    @property
+    def logger(self):
+        return logging.getLogger(self.name)
 
     def __repr__(self):
         return f"<ExecutionLoop name={self.name}>"
@@ -47,435 +159,1213 @@ class ExecutionLoop:
     def end(self, value):
         return value
 
-    def on_notify(self, action, func):
-        self._notify[action].add(func)
-
-    def notify(self, action):
-        for func in self._notify[action]:
-            func(self)
+    def on_notify(self, action, func, opcodes=None):
+        self._notify.subscribe(action, func, opcodes)
 
     def run(self):
-        while self.stack:
-            inst = self.stack.next()
-
-            self.notify("INSTRUCTION")
-
-            match inst.opname:
-                case "POP_TOP":
-                    self.stack.pop()
-                case "COPY":
-                    self.stack.append(self.stack[-inst.arg])
-
-                case "NOP" | "RESUME":
-                    pass
-
-                case "PUSH_NULL":
-                    self.stack.append(NULL)
-
-                case "FORMAT_VALUE":
-                    formater = ""
-
-                    if (inst.arg & 0x04) == 0x04:
-                        formater = self.stack.pop()
-
-                    value = self.stack.pop()
-                    if (inst.arg & 0x03) == 0x00:
-                        # dont format
-                        pass
-                    elif (inst.arg & 0x03) == 0x01:
-                        value = str(value)
-                    elif (inst.arg & 0x03) == 0x02:
-                        value = repr(value)
-                    elif (inst.arg & 0x03) == 0x03:
-                        value = ascii(value)
-
-                    self.stack.append(format(value, formater))
-
-                case "RETURN_VALUE":
-                    return self.end(self.stack.pop())
-
-                case "RETURN_CONST":
-                    # return self.end(self.co_consts[inst.arg])
-                    return self.end(inst.argval)
-
-                # -----
-                # store function
-                # -----
-                case "STORE_FAST":
-                    self.co_varnames[inst.arg] = self.stack.pop()
-
-                case "STORE_GLOBAL":
-                    self.co_globals[inst.argval] = self.stack.pop()
-
-                case "STORE_NAME":
-                    self.co_names[inst.argval] = self.stack.pop()
-
-                case "STORE_SUBSCR":
-                    key = self.stack.pop()
-                    container = self.stack.pop()
-                    value = self.stack.pop()
-                    container[key] = value
-
-                case "STORE_SLICE":
-                    end = self.stack.pop()
-                    start = self.stack.pop()
-                    container = self.stack.pop()
-                    values = self.stack.pop()
-                    container[start:end] = value
-                # -----
-                # load function
-                # -----
-                case "LOAD_CONST":
-                    self.stack.append(inst.argval)
-
-                case "LOAD_FAST_AND_CLEAR":
-                    self.stack.append(self.co_varnames.pop(inst.arg, None))
-
-                case "LOAD_FAST":
-                    self.stack.append(self.co_varnames[inst.arg])
-
-                case "LOAD_GLOBAL":
-                    for store in (self.co_globals, self.co_builtins):
-                        if inst.argval in store:
-                            self.stack.append(store[inst.argval])
-                            break
+        return self.drive()[0]
+
+    def run_slice(self, budget):
+        """
+        same as `run`, stopped after `budget` instructions and resumed by the
+        next slice, see interpreter/scheduler.py: (value,) when the loop
+        returned, None when it's preempted
+
+        the python calls (native functions, generators bodies) can't be
+        suspended, they run to their end in the slice calling them
+        """
+        return self.drive(budget)
+
+    def drive(self, budget=None):
+        """
+        run the loop and the interpreted calls it makes, (value,) when it
+        returned; with a `budget` of instructions, None when it's spent,
+        the next call resumes the innermost call where it stopped
+
+        the handlers return None to continue the loop, a 1-tuple holding the
+        value returned by the loop, or the loop of an interpreted call: it
+        runs here in place of its caller, resumed when it returns, the calls
+        don't recurse on the python stack
+
+        the events CALL, RETURN and YIELD of the hooks are emitted here,
+        where the loops switch, see interpreter/hooks.py
+        """
+        if budget is None:
+            loop = self.innermost = self
+        else:
+            loop = self.innermost
+        self.remaining = budget
+        try:
+            while True:
+                hooks = loop._notify
+                try:
+                    if hooks.slow:
+                        result = loop.execute_notify(hooks, self)
+                    elif budget is None:
+                        result = loop.execute(hooks.dispatch)
                     else:
-                        raise Exception(f"Can't find {inst.argval!r}")
-
-                case "LOAD_NAME":
-                    for store in (
-                        self.co_names,
-                        self.co_locals,
-                        self.co_globals,
-                        self.co_builtins,
-                    ):
-                        if inst.argval in store:
-                            self.stack.append(store[inst.argval])
-                            break
-                    else:
-                        raise Exception(f"Can't find {inst.argval!r}")
+                        result = loop.execute_budget(hooks.dispatch, self)
+                    if result is PREEMPTED:
+                        return None
+                except BaseException as error:
+                    # unwind the calls in progress up to a try block
+                    while not loop.handle(error):
+                        if loop is self:
+                            raise
+                        loop = loop.caller
+                    if loop._notify.slow:
+                        loop._notify.emit("JUMP", loop)
+                    result = None
+
+                if result is None:
+                    pass
+                elif type(result) is not tuple:
+                    result.caller = loop
+                    loop = result
+                    if loop._notify.events:
+                        loop._notify.emit("CALL", loop)
+                elif loop is self:
+                    if hooks.events:
+                        loop.emit_leave()
+                    return result
+                else:
+                    callee = loop
+                    loop = callee.caller
+                    callee.caller = None
+                    if hooks.events:
+                        callee.emit_leave()
+                    callee.release()
+                    loop.stack.append(result[0])
+
+                # on an error the loops of the calls in progress are
+                # kept for the error report, out of the pool
+                self.innermost = loop
+        finally:
+            if budget is not None:
+                self.executed += budget - self.remaining
+
+    def emit_leave(self):
+        """emit the RETURN or YIELD event of the loop returning a value"""
+        frame = self.frame
+        if frame.insts[frame.pointer - 1].opcode == _YIELD_VALUE:
+            self._notify.emit("YIELD", self)
+        else:
+            self._notify.emit("RETURN", self)
+
+    def execute(self, dispatch):
+        """run the instructions up to a call, a return or a yield, the handler result"""
+        frame = self.frame
+        insts = self.code.fast_insts
+        length = len(insts)
+        while frame.pointer < length:
+            inst = insts[frame.pointer]
+            frame.pointer += 1
+
+            result = dispatch[inst.opcode](self, inst)
+            if result is not None:
+                return result
+        return (self.end(self.stack.pop() if self.stack else None),)
+
+    def execute_budget(self, dispatch, root):
+        """same as `execute`, PREEMPTED once the budget of `root` is spent"""
+        frame = self.frame
+        insts = self.code.fast_insts
+        length = len(insts)
+        remaining = root.remaining
+        try:
+            while frame.pointer < length:
+                if not remaining:
+                    return PREEMPTED
+                remaining -= 1
+                inst = insts[frame.pointer]
+                frame.pointer += 1
+
+                result = dispatch[inst.opcode](self, inst)
+                if result is not None:
+                    return result
+        finally:
+            root.remaining = remaining
+        return (self.end(self.stack.pop() if self.stack else None),)
+
+    def execute_notify(self, hooks, root):
+        """
+        same as `execute_budget` for the INSTRUCTION subscribers of all the
+        opcodes and the JUMP ones: the original instructions run, each one
+        notified, the budget of `root` is None outside the slices
+        """
+        dispatch = hooks.dispatch
+        frame = self.frame
+        insts = frame.insts
+        length = len(insts)
+        remaining = root.remaining
+        try:
+            while frame.pointer < length:
+                if remaining is not None:
+                    if not remaining:
+                        return PREEMPTED
+                    remaining -= 1
+                pointer = frame.pointer
+                inst = insts[pointer]
+                frame.pointer += 1
+
+                for func in hooks.instructions[inst.opcode]:
+                    func(self)
+                result = dispatch[inst.opcode](self, inst)
+                if result is not None:
+                    return result
+                if frame.pointer != pointer + 1:
+                    hooks.emit("JUMP", self)
+        finally:
+            root.remaining = remaining
+        return (self.end(self.stack.pop() if self.stack else None),)
+
+    def handle(self, error):
+        """
+        jump to the handler of `error` raised by the actual instruction,
+        False when it's raised outside of the try blocks
+        """
+        # raised while an except block runs, chained like CPython
+        exception = self.exception
+        if exception is not None and error.__context__ is None:
+            _set_context(error, exception)
+
+        handlers = self.code.handlers
+        if handlers is None:
+            return False
+        frame = self.frame
+        handler = handlers[frame.pointer - 1]
+        if handler is None:
+            return False
+
+        target, depth, lasti = handler
+        del self.stack[depth:]
+        if lasti:
+            self.stack.append(frame.insts[frame.pointer - 1].offset)
+        self.stack.append(error)
+        frame.pointer = target
+        return True
+
+    def throw(self, error):
+        """run the loop from the handler of `error` raised by the actual instruction"""
+        if not self.handle(error):
+            raise error
+        return self.run()
+
+    def not_implemented(self, inst):
+        self.logger.warning("Instruction %r not implemented...", inst.opname)
+
+    @opcode("POP_TOP")
+    def pop_top(self, inst):
+        self.stack.pop()
+
+    @opcode("COPY")
+    def copy(self, inst):
+        self.stack.append(self.stack[-inst.arg])
+
+    @opcode("NOP", "RESUME", "EXTENDED_ARG")
+    def nop(self, inst):
+        pass
+
+    @opcode("PUSH_NULL")
+    def push_null(self, inst):
+        self.stack.append(NULL)
+
+    @opcode("FORMAT_VALUE")
+    def format_value(self, inst):
+        formater = ""
+
+        if (inst.arg & 0x04) == 0x04:
+            formater = self.stack.pop()
+
+        value = self.stack.pop()
+        if (inst.arg & 0x03) == 0x00:
+            # dont format
+            pass
+        elif (inst.arg & 0x03) == 0x01:
+            value = str(value)
+        elif (inst.arg & 0x03) == 0x02:
+            value = repr(value)
+        elif (inst.arg & 0x03) == 0x03:
+            value = ascii(value)
+
+        self.stack.append(format(value, formater))
+
+    @opcode("RETURN_VALUE")
+    def return_value(self, inst):
+        return (self.end(self.stack.pop()),)
+
+    @opcode("RETURN_CONST")
+    def return_const(self, inst):
+        # return self.end(self.co_consts[inst.arg])
+        return (self.end(inst.argval),)
+
+    # -----
+    # store function
+    # -----
+    @opcode("STORE_FAST")
+    def store_fast(self, inst):
+        self.fastlocals[inst.arg] = self.stack.pop()
+
+    # stores inline Namespace.__setitem__, they are as hot as the loads
+    @opcode("STORE_GLOBAL")
+    def store_global(self, inst):
+        co_globals = self.co_globals
+        if inst.argval not in co_globals:
+            co_globals.version = next_version()
+        dict.__setitem__(co_globals, inst.argval, self.stack.pop())
+
+    @opcode("STORE_NAME")
+    def store_name(self, inst):
+        co_names = self.co_names
+        if inst.argval not in co_names:
+            co_names.version = next_version()
+        dict.__setitem__(co_names, inst.argval, self.stack.pop())
+
+    @opcode("STORE_SUBSCR")
+    def store_subscr(self, inst):
+        key = self.stack.pop()
+        container = self.stack.pop()
+        value = self.stack.pop()
+        container[key] = value
+
+    @opcode("STORE_SLICE")
+    def store_slice(self, inst):
+        values, container, start, end = self.stack.popn(4)
+        container[start:end] = values
+
+    # -----
+    # load function
+    # -----
+    @opcode("LOAD_CONST")
+    def load_const(self, inst):
+        self.stack.append(inst.argval)
+
+    @opcode("LOAD_FAST_AND_CLEAR")
+    def load_fast_and_clear(self, inst):
+        # saved by the inlined comprehensions, UNBOUND is stored back as is
+        fastlocals = self.fastlocals
+        self.stack.append(fastlocals[inst.arg])
+        fastlocals[inst.arg] = UNBOUND
+
+    @opcode("LOAD_FAST")
+    def load_fast(self, inst):
+        # the compiler emits LOAD_FAST_CHECK for the locals maybe unbound
+        self.stack.append(self.fastlocals[inst.arg])
+
+    @opcode("LOAD_FAST_CHECK")
+    def load_fast_check(self, inst):
+        value = self.fastlocals[inst.arg]
+        if value is UNBOUND:
+            raise _unbound(inst.argval)
+        self.stack.append(value)
+
+    def lookup(self, name, index, version, chain):
+        """
+        slow path of the name loads: search `name` in the namespaces `chain`
+        and remember the one holding it in the inline cache of the instruction `index`
+        """
+        LOAD_CACHE.misses += 1
+        for store in chain:
+            if name in store:
+                self.code.caches[index] = (version, store)
+                return store[name]
+        raise NameError(f"name {name!r} is not defined")
+
+    def load_global_value(self, name, index):
+        # the cache is valid while the keys of the globals don't change,
+        # a name removed from the builtins fall back on the slow path
+        entry = self.code.caches[index]
+        version = self.co_globals.version
+        if entry is not None and entry[0] == version:
+            try:
+                value = entry[1][name]
+            except KeyError:
+                pass
+            else:
+                LOAD_CACHE.hits += 1
+                return value
+        return self.lookup(name, index, version, (self.co_globals, self.co_builtins))
+
+    @opcode("LOAD_GLOBAL")
+    def load_global(self, inst):
+        # the low bit asks a NULL before the function, see CALL
+        if inst.arg & 0x01:
+            self.stack.append(NULL)
+        self.stack.append(self.load_global_value(inst.argval, self.frame.pointer - 1))
+
+    @opcode("LOAD_NAME")
+    def load_name(self, inst):
+        index = self.frame.pointer - 1
+        co_names = self.co_names
+        if co_names is self.co_globals:
+            self.stack.append(self.load_global_value(inst.argval, index))
+            return
+
+        entry = self.code.caches[index]
+        version = (co_names.version, self.co_globals.version)
+        if entry is not None and entry[0] == version:
+            try:
+                value = entry[1][inst.argval]
+            except KeyError:
+                pass
+            else:
+                LOAD_CACHE.hits += 1
+                self.stack.append(value)
+                return
+        self.stack.append(
+            self.lookup(
+                inst.argval,
+                index,
+                version,
+                (co_names, self.co_globals, self.co_builtins),
+            )
+        )
+
+    @opcode("LOAD_FROM_DICT_OR_GLOBALS")
+    def load_from_dict_or_globals(self, inst):
+        # the mapping comes from the stack and can't be cached,
+        # only the globals/builtins part of the lookup is
+        mapping = self.stack.pop()
+        if inst.argval in mapping:
+            self.stack.append(mapping[inst.argval])
+        else:
+            self.stack.append(
+                self.load_global_value(inst.argval, self.frame.pointer - 1)
+            )
+
+    @opcode("LOAD_ATTR")
+    def load_attr(self, inst):
+        attr = getattr(self.stack.pop(), inst.argval)
+        # method call, the bound method goes after a NULL, see CALL
+        if inst.arg & 0x01:
+            self.stack.append(NULL)
+        self.stack.append(attr)
+
+    # -----
+    # function functions
+    # -----
+    @opcode("MAKE_FUNCTION")
+    def make_function(self, inst):
+        # the optional values are pushed before the code, in the flags order
+        code = self.stack.pop()
+        closure = self.stack.pop() if inst.arg & 0x08 else None
+        annotations = self.stack.pop() if inst.arg & 0x04 else None
+        kwdefaults = self.stack.pop() if inst.arg & 0x02 else None
+        defaults = self.stack.pop() if inst.arg & 0x01 else None
+        self.stack.append(
+            Function(
+                code,
+                self.co_globals,
+                self.co_builtins,
+                notify=self._notify,
+                defaults=defaults,
+                kwdefaults=kwdefaults,
+                annotations=annotations,
+                closure=closure,
+            )
+        )
+
+    @opcode("CALL")
+    def call(self, inst):
+        # under the arguments: NULL and the callable,
+        # or the callable and its first argument
+        # peekn and dropn inline, the hottest instruction
+        stack = self.stack
+        start = len(stack) - inst.arg
+        if stack[start - 2] is NULL:
+            caller = stack[start - 1]
+            args = stack[start:]
+        else:
+            caller = stack[start - 2]
+            args = stack[start - 1 :]
+        del stack[start - 2 :]
+
+        kwnames = self.kwnames
+        if kwnames:
+            self.kwnames = ()
+        if type(caller) is Function:
+            # run by the driver loop of `run`, in the except block of its caller
+            callee = caller.enter(args, kwnames)
+            callee.exception = self.exception
+            return callee
+        elif self.exception is not None:
+            split = len(args) - len(kwnames)
+            kwargs = dict(zip(kwnames, args[split:]))
+            stack.append(_call_handling(self.exception, caller, args[:split], kwargs))
+        elif kwnames:
+            split = len(args) - len(kwnames)
+            stack.append(caller(*args[:split], **dict(zip(kwnames, args[split:]))))
+        else:
+            stack.append(caller(*args))
+
+    @opcode("CALL_FUNCTION_EX")
+    def call_function_ex(self, inst):
+        # f(*args, **kwargs), the arguments are a tuple and a dict
+        # NULL pushed before the function
+        if inst.arg & 0x01:
+            _, caller, args, kwargs = self.stack.popn(4)
+        else:
+            _, caller, args = self.stack.popn(3)
+            kwargs = None
+        args = tuple(args)
+        if type(caller) is Function:
+            if kwargs:
+                callee = caller.enter((*args, *kwargs.values()), tuple(kwargs))
+            else:
+                callee = caller.enter(args)
+            callee.exception = self.exception
+            return callee
+        if self.exception is not None:
+            kwargs = kwargs or {}
+            self.stack.append(_call_handling(self.exception, caller, args, kwargs))
+        else:
+            self.stack.append(caller(*args, **kwargs) if kwargs else caller(*args))
+
+    @opcode("KW_NAMES")
+    def kw_names(self, inst):
+        self.kwnames = inst.argval
+
+    # -----
+    # conditions instructions
+    # -----
+    @opcode("POP_JUMP_IF_TRUE")
+    def pop_jump_if_true(self, inst):
+        if self.stack.pop():
+            self.frame.jump()
+
+    @opcode("POP_JUMP_IF_FALSE")
+    def pop_jump_if_false(self, inst):
+        if not self.stack.pop():
+            self.frame.jump()
+
+    @opcode("POP_JUMP_IF_NOT_NONE")
+    def pop_jump_if_not_none(self, inst):
+        if self.stack.pop() is not None:
+            self.frame.jump()
+
+    @opcode("POP_JUMP_IF_NONE")
+    def pop_jump_if_none(self, inst):
+        if self.stack.pop() is None:
+            self.frame.jump()
+
+    # -----
+    # Jump instructions
+    # -----
+    @opcode("JUMP_FORWARD", "JUMP_BACKWARD", "JUMP_BACKWARD_NO_INTERRUPT")
+    def jump(self, inst):
+        self.frame.jump()
+
+    # -----
+    # operator str
+    # -----
+    @opcode("BUILD_STRING")
+    def build_string(self, inst):
+        self.stack.append("".join(self.stack.popn(inst.arg)))
+
+    # -----
+    # operator MAP/Dict
+    # -----
+    @opcode("BUILD_MAP")
+    def build_map(self, inst):
+        # keys and values are interleaved on the stack
+        values = self.stack.popn(inst.arg * 2)
+        self.stack.append(dict(zip(values[::2], values[1::2])))
+
+    @opcode("BUILD_CONST_KEY_MAP")
+    def build_const_key_map(self, inst):
+        keys = self.stack.pop()
+        self.stack.append(dict(zip(keys, self.stack.popn(inst.arg))))
+
+    @opcode("MAP_ADD")
+    def map_add(self, inst):
+        value = self.stack.pop()
+        key = self.stack.pop()
+        dtc = self.stack[-inst.arg]
+        dtc[key] = value
+
+    # dict merge not raise error
+    @opcode("DICT_MERGE", "DICT_UPDATE")
+    def dict_update(self, inst):
+        mapping = self.stack.pop()
+        self.stack[-inst.arg].update(mapping)
+
+    # -----
+    # operator TUPLE
+    # -----
+    @opcode("BUILD_TUPLE")
+    def build_tuple(self, inst):
+        self.stack.append(self.stack.popn(inst.arg))
+
+    # -----
+    # operator LIST
+    # -----
+    @opcode("BUILD_LIST")
+    def build_list(self, inst):
+        stack = self.stack
+        # the slice is already a new list
+        values = stack.peekn(inst.arg)
+        stack.dropn(inst.arg)
+        stack.append(values)
+
+    @opcode("LIST_APPEND")
+    def list_append(self, inst):
+        item = self.stack.pop()
+        self.stack[-inst.arg].append(item)
+
+    @opcode("LIST_EXTEND")
+    def list_extend(self, inst):
+        seq = self.stack.pop()
+        self.stack[-inst.arg].extend(seq)
+
+    # -----
+    # operator SET
+    # -----
+    @opcode("BUILD_SET")
+    def build_set(self, inst):
+        self.stack.append(set(self.stack.popn(inst.arg)))
+
+    @opcode("SET_ADD")
+    def set_add(self, inst):
+        item = self.stack.pop()
+        self.stack[-inst.arg].add(item)
+
+    @opcode("SET_UPDATE")
+    def set_update(self, inst):
+        item = self.stack.pop()
+        self.stack[-inst.arg].update(item)
+
+    # -----
+    # operator instructions
+    # -----
+    @opcode("SWAP")
+    def swap(self, inst):
+        value = self.stack[-inst.arg]
+        lastvalue = self.stack[-1]
+        self.stack[-inst.arg] = lastvalue
+        self.stack[-1] = value
+
+    @opcode("UNPACK_SEQUENCE")
+    def unpack_sequence(self, inst):
+        self.stack.extend(self.stack.pop()[: -inst.arg - 1 : -1])
+
+    @opcode("IS_OP")
+    def is_op(self, inst):
+        second, first = self.stack.pop(), self.stack.pop()
+        if inst.arg == 1:
+            self.stack.append(first is not second)
+        else:
+            self.stack.append(first is second)
+
+    @opcode("CONTAINS_OP")
+    def contains_op(self, inst):
+        second, first = self.stack.pop(), self.stack.pop()
+        if inst.arg == 1:
+            self.stack.append(first not in second)
+        else:
+            self.stack.append(first in second)
+
+    @opcode("COMPARE_OP")
+    def compare_op(self, inst):
+        second, first = self.stack.pop(), self.stack.pop()
+        self.stack.append(COMPARES[inst.arg](first, second))
+
+        index = self.frame.pointer - 1
+        counters = self.code.counters
+        counters[index] += 1
+        if counters[index] >= WARMUP:
+            specialize_compare_op(self.code, index, inst, first, second)
+
+    @opcode("BINARY_OP")
+    def binary_op(self, inst):
+        second, first = self.stack.pop(), self.stack.pop()
+        self.stack.append(OPERATORS[inst.arg](first, second))
+
+        index = self.frame.pointer - 1
+        counters = self.code.counters
+        counters[index] += 1
+        if counters[index] >= WARMUP:
+            specialize_binary_op(self.code, index, inst, first, second)
+
+    # -----
+    # specialized instructions, see interpreter/specialize.py
+    # they check the operands types and fall back on the generic instruction
+    # -----
+    def deoptimize(self, table, inst, first, second):
+        deoptimize(self.code, self.frame.pointer - 1)
+        return table[inst.arg](first, second)
+
+    @opcode("BINARY_OP_ADD_INT")
+    def binary_op_add_int(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is int and type(second) is int:
+            stack[-1] = first + second
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("BINARY_OP_SUBTRACT_INT")
+    def binary_op_subtract_int(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is int and type(second) is int:
+            stack[-1] = first - second
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("BINARY_OP_MULTIPLY_INT")
+    def binary_op_multiply_int(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is int and type(second) is int:
+            stack[-1] = first * second
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("BINARY_OP_ADD_FLOAT")
+    def binary_op_add_float(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is float and type(second) is float:
+            stack[-1] = first + second
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("BINARY_OP_SUBTRACT_FLOAT")
+    def binary_op_subtract_float(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is float and type(second) is float:
+            stack[-1] = first - second
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("BINARY_OP_MULTIPLY_FLOAT")
+    def binary_op_multiply_float(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is float and type(second) is float:
+            stack[-1] = first * second
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("BINARY_OP_ADD_STR")
+    def binary_op_add_str(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is str and type(second) is str:
+            stack[-1] = first + second
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("BINARY_OP_INT")
+    def binary_op_int(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is int and type(second) is int:
+            stack[-1] = inst.argval(first, second)
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("BINARY_OP_FLOAT")
+    def binary_op_float(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is float and type(second) is float:
+            stack[-1] = inst.argval(first, second)
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("BINARY_OP_STR")
+    def binary_op_str(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is str and type(second) is str:
+            stack[-1] = inst.argval(first, second)
+        else:
+            stack[-1] = self.deoptimize(OPERATORS, inst, first, second)
+
+    @opcode("COMPARE_OP_INT")
+    def compare_op_int(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is int and type(second) is int:
+            stack[-1] = inst.argval(first, second)
+        else:
+            stack[-1] = self.deoptimize(COMPARES, inst, first, second)
+
+    @opcode("COMPARE_OP_FLOAT")
+    def compare_op_float(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is float and type(second) is float:
+            stack[-1] = inst.argval(first, second)
+        else:
+            stack[-1] = self.deoptimize(COMPARES, inst, first, second)
+
+    @opcode("COMPARE_OP_STR")
+    def compare_op_str(self, inst):
+        stack = self.stack
+        second = stack.pop()
+        first = stack[-1]
+        if type(first) is str and type(second) is str:
+            stack[-1] = inst.argval(first, second)
+        else:
+            stack[-1] = self.deoptimize(COMPARES, inst, first, second)
+
+    @opcode("UNARY_NOT")
+    def unary_not(self, inst):
+        self.stack[-1] = not self.stack[-1]
+
+    @opcode("UNARY_NEGATIVE")
+    def unary_negative(self, inst):
+        self.stack[-1] = -self.stack[-1]
+
+    @opcode("UNARY_INVERT")
+    def unary_invert(self, inst):
+        self.stack[-1] = ~self.stack[-1]
+
+    @opcode("GET_LEN")
+    def get_len(self, inst):
+        self.stack.append(len(self.stack[-1]))
+
+    @opcode("BINARY_SUBSCR")
+    def binary_subscr(self, inst):
+        key = self.stack.pop()
+        container = self.stack.pop()
+        self.stack.append(container[key])
+
+    @opcode("BINARY_SLICE")
+    def binary_slice(self, inst):
+        container, start, end = self.stack.popn(3)
+        self.stack.append(container[start:end])
+
+    # -----
+    # delete instructions
+    # -----
+    @opcode("DELETE_SUBSCR")
+    def delete_subscr(self, inst):
+        key = self.stack.pop()
+        container = self.stack.pop()
+        del container[key]
+
+    @opcode("DELETE_NAME")
+    def delete_name(self, inst):
+        self.co_names.pop(inst.argval, None)
+
+    @opcode("DELETE_GLOBAL")
+    def delete_global(self, inst):
+        self.co_globals.pop(inst.argval, None)
+
+    @opcode("DELETE_FAST")
+    def delete_fast(self, inst):
+        if self.fastlocals[inst.arg] is UNBOUND:
+            raise _unbound(inst.argval)
+        self.fastlocals[inst.arg] = UNBOUND
+
+    # -----
+    # iter instructions
+    # -----
+    @opcode("GET_YIELD_FROM_ITER")
+    def get_yield_from_iter(self, inst):
+        value = self.stack[-1]
+        if isinstance(value, (Coroutine, CoroutineType)):
+            if not self.code.code.co_flags & (CO_COROUTINE | CO_ITERABLE_COROUTINE):
+                raise TypeError(
+                    "cannot 'yield from' a coroutine object in a non-coroutine generator"
+                )
+        elif type(value) is not Generator and not inspect.isgenerator(value):
+            self.stack[-1] = iter(value)
+
+    @opcode("GET_ITER")
+    def get_iter(self, inst):
+        self.stack[-1] = iter(self.stack[-1])
+
+    @opcode("FOR_ITER")
+    def for_iter(self, inst):
+        iterator = self.stack[-1]
+        try:
+            self.stack.append(next(iterator))
+        except StopIteration:
+            self.frame.jump()
+            self.stack.append(NULL)
+
+    @opcode("END_FOR")
+    def end_for(self, inst):
+        self.stack.dropn(2)
+
+    @opcode("RETURN_GENERATOR")
+    def return_generator(self, inst):
+        # the generator keep running the loop after the call, its body
+        # doesn't run in the except block of the call
+        self.escaped = True
+        self.exception = None
+        flags = self.code.code.co_flags
+        if flags & CO_COROUTINE:
+            return (Coroutine(self),)
+        if flags & CO_ASYNC_GENERATOR:
+            return (AsyncGenerator(self),)
+        generator = Generator(self)
+        # iterated by the for loop of the caller, the generator is only on its
+        # stack: nothing can send it a value, see Generator.run_ahead
+        caller = self.caller
+        if caller is not None:
+            frame = caller.frame
+            if frame.insts[frame.pointer].opcode == _GET_ITER:
+                generator.run_ahead()
+        return (generator,)
+
+    @opcode("YIELD_VALUE")
+    def yield_value(self, inst):
+        return (self.stack.pop(),)
+
+    # -----
+    # coroutine instructions
+    # `yield from` and `await` are a SEND loop, the values yielded by
+    # the receiver go through the loop up to the event loop
+    # -----
+    @opcode("SEND")
+    def send(self, inst):
+        value = self.stack[-1]
+        receiver = self.stack[-2]
+        try:
+            # the native coroutines aren't iterators
+            if value is None and type(receiver) is not CoroutineType:
+                self.stack[-1] = next(receiver)
+            else:
+                self.stack[-1] = receiver.send(value)
+        except StopIteration as stop:
+            self.stack[-1] = stop.value
+            self.frame.jump()
+
+    @opcode("END_SEND")
+    def end_send(self, inst):
+        del self.stack[-2]
+
+    @opcode("CLEANUP_THROW")
+    def cleanup_throw(self, inst):
+        # under the exception raised by `throw`: the receiver and the last sent value
+        error = self.stack.pop()
+        if not isinstance(error, StopIteration):
+            raise error
+        self.stack.dropn(2)
+        self.stack.extend((None, error.value))
+
+    @opcode("GET_AWAITABLE")
+    def get_awaitable(self, inst):
+        self.stack[-1] = awaitable(self.stack[-1])
+
+    @opcode("GET_AITER")
+    def get_aiter(self, inst):
+        value = self.stack[-1]
+        self.stack[-1] = type(value).__aiter__(value)
+
+    @opcode("GET_ANEXT")
+    def get_anext(self, inst):
+        iterator = self.stack[-1]
+        self.stack.append(awaitable(type(iterator).__anext__(iterator)))
+
+    @opcode("END_ASYNC_FOR")
+    def end_async_for(self, inst):
+        error = self.stack.pop()
+        self.stack.pop()
+        if not isinstance(error, StopAsyncIteration):
+            raise error
+
+    @opcode("BEFORE_ASYNC_WITH")
+    def before_async_with(self, inst):
+        manager = self.stack.pop()
+        # the result of __aenter__ is awaited by the next instructions
+        self.stack.extend((manager.__aexit__, manager.__aenter__()))
+
+    # -----
+    # exception instructions, the handlers come from the exception table
+    # see ExecutionLoop.handle
+    # -----
+    @opcode("PUSH_EXC_INFO")
+    def push_exc_info(self, inst):
+        error = self.stack.pop()
+        self.stack.extend((self.exception, error))
+        self.exception = error
+
+    @opcode("POP_EXCEPT")
+    def pop_except(self, inst):
+        self.exception = self.stack.pop()
+
+    @opcode("CHECK_EXC_MATCH")
+    def check_exc_match(self, inst):
+        kind = self.stack.pop()
+        self.stack.append(isinstance(self.stack[-1], kind))
+
+    @opcode("RERAISE")
+    def reraise(self, inst):
+        raise self.stack.pop()
+
+    @opcode("RAISE_VARARGS")
+    def raise_varargs(self, inst):
+        if inst.arg == 0:
+            if self.exception is None:
+                raise RuntimeError("No active exception to reraise")
+            raise self.exception
+        if inst.arg == 1:
+            raise self.chain(self.stack.pop())
+        cause = self.stack.pop()
+        raise self.chain(self.stack.pop()) from cause
+
+    def chain(self, error):
+        """the exception raised by `raise error`, chained to the handled one"""
+        if isinstance(error, type) and issubclass(error, BaseException):
+            error = error()
+        if isinstance(error, BaseException) and self.exception is not None:
+            _set_context(error, self.exception)
+        return error
+
+    @opcode("CALL_INTRINSIC_1")
+    def call_intrinsic_1(self, inst):
+        self.stack[-1] = INTRINSICS[inst.arg](self, self.stack[-1])
+
+    # -----
+    # superinstructions, see interpreter/superinstructions.py
+    # the second instruction is read at the pointer and skipped
+    # -----
+    @opcode("LOAD_FAST__LOAD_FAST")
+    def load_fast__load_fast(self, inst):
+        frame = self.frame
+        second = frame.insts[frame.pointer]
+        frame.pointer += 1
+        self.stack.append(self.fastlocals[inst.arg])
+        self.stack.append(self.fastlocals[second.arg])
+
+    @opcode("LOAD_CONST__BINARY_OP")
+    def load_const__binary_op(self, inst):
+        # argval: the constant and the C function of the operator
+        self.frame.pointer += 1
+        const, function = inst.argval
+        stack = self.stack
+        stack[-1] = function(stack[-1], const)
+
+    @opcode("COMPARE_OP__POP_JUMP_IF_FALSE")
+    def compare_op__pop_jump_if_false(self, inst):
+        # argval: the C function of the comparison
+        frame = self.frame
+        frame.pointer += 1
+        stack = self.stack
+        second = stack.pop()
+        if not inst.argval(stack.pop(), second):
+            frame.jump()
+
+    @opcode("LOAD_GLOBAL__CALL")
+    def load_global__call(self, inst):
+        frame = self.frame
+        index = frame.pointer - 1
+        second = frame.insts[frame.pointer]
+        frame.pointer += 1
+        if inst.arg & 0x01:
+            self.stack.append(NULL)
+        self.stack.append(self.load_global_value(inst.argval, index))
+        return self.call(second)
+
+    @opcode("FOR_ITER__STORE_FAST")
+    def for_iter__store_fast(self, inst):
+        frame = self.frame
+        try:
+            value = next(self.stack[-1])
+        except StopIteration:
+            frame.jump()
+            self.stack.append(NULL)
+        else:
+            self.fastlocals[frame.insts[frame.pointer].arg] = value
+            frame.pointer += 1
+
+    # -----
+    # contextmanager instructions
+    # -----
+    @opcode("BEFORE_WITH")
+    def before_with(self, inst):
+        last = self.stack.pop()
+        # push exit for the WITH_EXCEPT_START instruction
+        self.stack.extend((last.__exit__, last.__enter__()))
+
+    @opcode("WITH_EXCEPT_START")
+    def with_except_start(self, inst):
+        # under the exception: __exit__, the offset and the previous exception
+        error = self.stack[-1]
+        context_exit = self.stack[-4]
+        self.stack.append(context_exit(type(error), error, error.__traceback__))
+
+    # -----
+    # import
+    # -----
+    @opcode("IMPORT_NAME")
+    def import_name(self, inst):
+        fromlist = self.stack.pop()
+        level = self.stack.pop()
+        module = __import__(
+            inst.argval,
+            globals=self.co_globals,
+            locals=self.co_names,
+            fromlist=fromlist,
+            level=level,
+        )
+        self.stack.append(module)
+
+    @opcode("IMPORT_FROM")
+    def import_from(self, inst):
+        module = self.stack[-1]
+        self.stack.append(getattr(module, inst.argval))
+
+
+def _unbound(name):
+    return UnboundLocalError(
+        f"cannot access local variable {name!r} where it is not associated with a value"
+    )
+
+
+def _set_context(error, context):
+    # the implicit chaining of CPython, without cycle: `error` found in
+    # the chain of `context` is cut out of it
+    if error is context:
+        return
+    chained = context
+    while chained.__context__ is not None:
+        if chained.__context__ is error:
+            chained.__context__ = None
+            break
+        chained = chained.__context__
+    error.__context__ = context
+
+
+def _call_handling(error, func, args, kwargs):
+    """
+    call the native `func` from an except block handling `error`: raised
+    here for python, sys.exc_info() and traceback.format_exc() see it
+    """
+    traceback, context = error.__traceback__, error.__context__
+    try:
+        raise error
+    except BaseException:
+        error.__traceback__ = traceback
+        error.__context__ = context
+        return func(*args, **kwargs)
+
+
+def awaitable(value):
+    """iterator of `await value`"""
+    if isinstance(value, (Coroutine, CoroutineType)):
+        return value
+    method = getattr(type(value), "__await__", None)
+    if method is None:
+        raise TypeError(
+            f"object {type(value).__name__} can't be used in 'await' expression"
+        )
+    return method(value)
+
+
+def _import_star(loop, module):
+    names = getattr(module, "__all__", None)
+    if names is None:
+        names = [name for name in vars(module) if not name.startswith("_")]
+    for name in names:
+        loop.co_names[name] = getattr(module, name)
+
+
+def _stopiteration_error(loop, error):
+    # a StopIteration leaving a generator body would end its consumer silently
+    flags = loop.code.code.co_flags
+    if flags & CO_ASYNC_GENERATOR:
+        kind = "async generator"
+    elif flags & CO_COROUTINE:
+        kind = "coroutine"
+    else:
+        kind = "generator"
+    if isinstance(error, StopIteration):
+        name = "StopIteration"
+    elif kind == "async generator" and isinstance(error, StopAsyncIteration):
+        name = "StopAsyncIteration"
+    else:
+        return error
+    replaced = RuntimeError(f"{kind} raised {name}")
+    replaced.__cause__ = error
+    return replaced
+
+
+# functions of CALL_INTRINSIC_1 indexed by its arg, see dis.intrinsic1_descs
+INTRINSICS = {
+    2: _import_star,
+    3: _stopiteration_error,
+    4: lambda loop, value: AsyncWrapped(value),
+    5: lambda loop, value: +value,
+    6: lambda loop, value: tuple(value),
+}
+
+
+_GET_ITER = OPMAP["GET_ITER"]
+_YIELD_VALUE = OPMAP["YIELD_VALUE"]
+
+
+class Function:
+    """an interpreted function, bound to the namespaces of the module defining it"""
 
-                case "LOAD_FROM_DICT_OR_GLOBALS":
-                    for store in (self.co_names, self.co_globals, self.co_builtins):
-                        if inst.argval in store:
-                            self.stack.append(store[inst.argval])
-                            break
-                    else:
-                        raise Exception(f"Can't find {inst.argval!r}")
-
-                case "LOAD_ATTR":
-                    attr = getattr(self.stack.pop(), inst.argval)
-                    self.stack.append(attr)
-
-                # -----
-                # function functions
-                # -----
-                case "MAKE_FUNCTION":
-                    __bytescode = self.stack.pop()
-                    __name = ""
-                    if self.stack.next_inst.opname == "STORE_NAME":
-                        __name = "Function: " + self.stack.next_inst.argval
-
-                    def caller(*ar, __bytescode=__bytescode, __name=__name, **kw):
-                        b = ExecutionLoop(
-                            dis.Bytecode(__bytescode),
-                            co_varnames=[*ar, *list(kw.values())],
-                            co_globals={
-                                **self.co_globals,
-                                **self.co_locals,
-                                **self.co_names,
-                            },
-                            name=__name,
-                            notify=self._notify,
-                        )
-                        with currentLoop(b):
-                            return b.run()
-
-                    self.stack.append(caller)
-
-                case "CALL":
-                    args = []
-                    kw = {}
-                    arguements_length = inst.argval
-                    if self._co_kw:
-                        for k in reversed(self._co_kw.pop()):
-                            kw[k] = self.stack.pop()
-                            arguements_length -= 1
-
-                    # args
-                    for _ in range(arguements_length):
-                        args.append(self.stack.pop())
-                    args = list(reversed(args))
-
-                    caller = self.stack.pop()
-
-                    need_self = False
-                    if self.stack and self.stack[-1] is NULL:
-                        need_self = True
-                        self.stack.pop()
-
-                    result = caller(*args, **kw)
-
-                    self.stack.append(result)
-
-                case "KW_NAMES":
-                    self._co_kw.append(inst.argval)
-
-                # -----
-                # conditions instructions
-                # -----
-                case "POP_JUMP_IF_TRUE":
-                    if self.stack.pop() is True:
-                        self.stack.jump_forward(2)
-
-                case "POP_JUMP_IF_FALSE":
-                    if self.stack.pop() is False:
-                        self.stack.jump_forward(2)
-
-                case "POP_JUMP_IF_NOT_NONE":
-                    if self.stack.pop() is not None:
-                        self.stack.jump_forward(2)
-
-                case "POP_JUMP_IF_NONE":
-                    if self.stack.pop() is None:
-                        self.stack.jump_forward(2)
-
-                # -----
-                # Jump instructions
-                # -----
-                case "JUMP_FORWARD":
-                    self.stack.jump_forward(2)
-
-                case "JUMP_BACKWARD":
-                    self.stack.jump_backward(2)
-
-                # -----
-                # operator str
-                # -----
-                case "BUILD_STRING":
-                    v = ""
-                    for _ in range(inst.arg):
-                        v = self.stack.pop() + v
-                    self.stack.append(v)
-
-                # -----
-                # operator MAP/Dict
-                # -----
-                case "BUILD_MAP":
-                    values = []
-                    count = inst.arg
-                    if count:
-                        values = self.stack[-count:]
-                        del self.stack[-count:]
-                    self.stack.append(dict(values))
-
-                case "MAP_ADD":
-                    value = self.stack.pop()
-                    key = self.stack.pop()
-                    dtc = self.stack[-inst.arg]
-                    dtc[key] = value
-
-                # dict merge not raise error
-                case "DICT_MERGE" | "DICT_UPDATE":
-                    self.stack[-inst.arg].update(self.stack.pop())
-
-                # -----
-                # operator TUPLE
-                # -----
-                case "BUILD_TUPLE":
-                    values = []
-                    count = inst.arg
-                    if count:
-                        values = self.stack[-count:]
-                        del self.stack[-count:]
-                    self.stack.append(tuple(values))
-
-                # -----
-                # operator LIST
-                # -----
-                case "BUILD_LIST":
-                    values = []
-                    count = inst.arg
-                    if count:
-                        values = self.stack[-count:]
-                        del self.stack[-count:]
-                    self.stack.append(list(values))
-
-                case "LIST_APPEND":
-                    item = self.stack.pop()
-                    self.stack[-inst.arg].append(item)
-
-                case "LIST_EXTEND":
-                    seq = self.stack.pop()
-                    self.stack[-inst.arg].extend(seq)
-
-                # -----
-                # operator SET
-                # -----
-                case "BUILD_SET":
-                    values = []
-                    count = inst.arg
-                    if count:
-                        self.stack, values = self.stack[:-count], self.stack[-count:]
-                    self.stack.append(set(values))
-
-                case "SET_ADD":
-                    item = self.stack.pop()
-                    self.stack[-inst.arg].add(item)
-
-                case "SET_UPDATE":
-                    item = self.stack.pop()
-                    self.stack[-inst.arg].update(item)
-
-                # -----
-                # operator instructions
-                # -----
-                case "SWAP":
-                    value = self.stack[-inst.arg]
-                    lastvalue = self.stack[-1]
-                    self.stack[-inst.arg] = lastvalue
-                    self.stack[-1] = value
-
-                case "UNPACK_SEQUENCE":
-                    self.stack.extend(self.stack.pop()[: -inst.arg - 1 : -1])
-
-                case "IS_OP":
-                    second, first = self.stack.pop(), self.stack.pop()
-                    if inst.arg == 1:
-                        self.stack.append(first is not second)
-                    else:
-                        self.stack.append(first is second)
+    def __init__(
+        self,
+        code,
+        co_globals,
+        co_builtins,
+        notify=None,
+        defaults=None,
+        kwdefaults=None,
+        annotations=None,
+        closure=None,
+    ):
+        self.code = code
+        self.co_globals = co_globals
+        self.co_builtins = co_builtins
+        self.notify = notify
+        self.plan = BindingPlan(code, defaults, kwdefaults)
+
+        self.__name__ = code.co_name
+        self.__qualname__ = code.co_qualname
+        self.__defaults__ = defaults
+        self.__kwdefaults__ = kwdefaults
+        self.__annotations__ = annotations or {}
+        self.__closure__ = closure
 
-                case "CONTAINS_OP":
-                    second, first = self.stack.pop(), self.stack.pop()
-                    if inst.arg == 1:
-                        self.stack.append(first not in second)
-                    else:
-                        self.stack.append(first in second)
-
-                case "COMPARE_OP":
-                    second, first = self.stack.pop(), self.stack.pop()
-                    self.stack.append(COMPARES[inst.arg](first, second))
-
-                case "BINARY_OP":
-                    second, first = self.stack.pop(), self.stack.pop()
-                    self.stack.append(OPERATORS[inst.arg](first, second))
-
-                case "UNARY_NOT":
-                    self.stack[-1] = not self.stack[-1]
-
-                case "UNARY_NEGATIVE":
-                    self.stack[-1] = -self.stack[-1]
-
-                case "UNARY_INVERT":
-                    self.stack[-1] = ~self.stack[-1]
-
-                case "GET_LEN":
-                    self.stack.append(len(self.stack[-1]))
-
-                case "BINARY_SUBSCR":
-                    key = self.stack.pop()
-                    container = self.stack.pop()
-                    self.stack.append(container[key])
-
-                case "BINARY_SLICE":
-                    end = self.stack.pop()
-                    start = self.stack.pop()
-                    container = self.stack.pop()
-                    self.stack.append(container[start:end])
-
-                # -----
-                # delete instructions
-                # -----
-                case "DELETE_SUBSCR":
-                    key = self.stack.pop()
-                    container = self.stack.pop()
-                    del container[key]
-
-                case "DELETE_NAME":
-                    self.co_names.pop(inst.argval, None)
-
-                case "DELETE_GLOBAL":
-                    self.co_globals.pop(inst.argval, None)
-
-                case "DELETE_FAST":
-                    self.co_varnames.pop(inst.argval, None)
-
-                # -----
-                # iter instructions
-                # -----
-                case "GET_YIELD_FROM_ITER":
-                    if all(
-                        (
-                            not inspect.isgenerator(self.stack[-1]),
-                            not inspect.isasyncgen(self.stack[-1]),
-                            not inspect.isawaitable(self.stack[-1]),
-                        )
-                    ):
-                        self.stack[-1] = iter(self.stack[-1])
-
-                case "GET_ITER":
-                    self.stack[-1] = iter(self.stack[-1])
-
-                case "FOR_ITER":
-                    iterator = self.stack[-1]
-                    try:
-                        self.stack.append(next(iterator))
-                    except StopIteration:
-                        self.stack.jump_forward(4)
-                        self.stack.append(NULL)
-
-                case "END_FOR":
-                    self.stack.pop()
-                    self.stack.pop()
-
-                case "RETURN_GENERATOR":
-                    return Generator(self)
-
-                case "YIELD_VALUE":
-                    return self.stack.pop()
-
-                # -----
-                # contextmanager instructions
-                # -----
-                case "BEFORE_WITH":
-                    last = self.stack.pop()
-                    # push exit for the WITH_EXCEPT_START instruction
-                    self.stack.extend((last.__exit__, last.__enter__()))
-
-                case "WITH_EXCEPT_START":
-                    exec_t = self.stack.pop()
-                    exec_v = self.stack.pop()
-                    exec_tb = self.stack.pop()
-
-                    context_exit = self.stack.pop()
-
-                    results = context_exit(exec_t, exec_v, exec_tb)
-
-                    self.stack.append(results)
-
-                # -----
-                # import
-                # -----
-                case "IMPORT_NAME":
-                    fromlist = self.stack.pop()
-                    level = self.stack.pop()
-                    module = __import__(
-                        inst.argval,
-                        globals=self.co_globals,
-                        locals=self.co_locals,
-                        fromlist=fromlist,
-                        level=level,
-                    )
-                    self.stack.append(module)
-
-                case "IMPORT_FROM":
-                    module = self.stack[-1]
-                    self.stack.append(getattr(module, inst.argval))
-
-                case _:
-                    self.logger.warning(
-                        "Instruction %r not implemented...", inst.opname
-                    )
-
-        return self.end(self.stack.pop())
+    def __repr__(self):
+        return f"<Function {self.__qualname__}>"
+
+    def __call__(self, *ar, **kw):
+        if kw:
+            return self.call((*ar, *kw.values()), tuple(kw))
+        return self.call(ar)
+
+    def enter(self, args, kw_names=()):
+        """
+        loop of a call ready to run, the values of the keyword arguments
+        are at the end of `args`
+        """
+        return ExecutionLoop.acquire(
+            self.code,
+            co_varnames=self.plan.bind(args, kw_names),
+            co_globals=self.co_globals,
+            co_builtins=self.co_builtins,
+            name=f"Function: {self.__qualname__}",
+            notify=self.notify,
+        )
+
+    def call(self, args, kw_names=()):
+        return self.enter(args, kw_names).invoke()
+
+
+# handlers indexed by opcode, built once for all the loops
+ExecutionLoop.dispatch = dispatch_table(ExecutionLoop, ExecutionLoop.not_implemented)
@@ -0,0 +1,79 @@
+from itertools import count
+
+# versions are unique across all the namespaces, an inline cache holding
+# a version can't be valid for another namespace
+_versions = count(1)
+next_version = _versions.__next__
+
+
+class Namespace(dict):
+    """
+    dict tagged with a version changing each time its set of keys change,
+    rebinding an existing key keep the version
+    """
+
+    __slots__ = ("version",)
+
+    def __init__(self, *ar, **kw):
+        super().__init__(*ar, **kw)
+        self.version = next_version()
+
+    def __setitem__(self, key, value):
+        if key not in self:
+            self.version = next_version()
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version = next_version()
+
+    def pop(self, *ar):
+        value = super().pop(*ar)
+        self.version = next_version()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self.version = next_version()
+        return item
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.version = next_version()
+        return super().setdefault(key, default)
+
+    def update(self, *ar, **kw):
+        super().update(*ar, **kw)
+        self.version = next_version()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def clear(self):
+        super().clear()
+        self.version = next_version()
+
+
+class CacheStats:
+    """hits and misses counters of the name loads inline caches"""
+
+    __slots__ = ("hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def ratio(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def reset(self):
+        self.hits = self.misses = 0
+
+    def __repr__(self):
+        return f"<CacheStats hits={self.hits} misses={self.misses} ratio={self.ratio:.2%}>"
+
+
+LOAD_CACHE = CacheStats()
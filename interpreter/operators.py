@@ -1,3 +1,4 @@
+import operator
 from enum import UNIQUE, IntEnum, verify
 
 
@@ -49,17 +50,50 @@ OPERATORS = {
     INSTRUCTION.XOR: lambda a, b: a ^ b,
 }
 
-# ADD i INSTRUCTIONS
-OPERATORS[INSTRUCTION.IADD] = OPERATORS[INSTRUCTION.ADD]
-OPERATORS[INSTRUCTION.IAND] = OPERATORS[INSTRUCTION.AND]
-OPERATORS[INSTRUCTION.IFLOORDIV] = OPERATORS[INSTRUCTION.FLOORDIV]
-OPERATORS[INSTRUCTION.ILEFT_SHIFT] = OPERATORS[INSTRUCTION.LEFT_SHIFT]
-OPERATORS[INSTRUCTION.IMATMULT] = OPERATORS[INSTRUCTION.MATMULT]
-OPERATORS[INSTRUCTION.IMULT] = OPERATORS[INSTRUCTION.MULT]
-OPERATORS[INSTRUCTION.IMOD] = OPERATORS[INSTRUCTION.MOD]
-OPERATORS[INSTRUCTION.IOR] = OPERATORS[INSTRUCTION.OR]
-OPERATORS[INSTRUCTION.IPOW] = OPERATORS[INSTRUCTION.POW]
-OPERATORS[INSTRUCTION.IRIGHT_SHIFT] = OPERATORS[INSTRUCTION.RIGHT_SHIFT]
-OPERATORS[INSTRUCTION.ISUB] = OPERATORS[INSTRUCTION.SUB]
-OPERATORS[INSTRUCTION.IDIV] = OPERATORS[INSTRUCTION.DIV]
-OPERATORS[INSTRUCTION.IXOR] = OPERATORS[INSTRUCTION.XOR]
+# ADD i INSTRUCTIONS, they mutate the left operand when it supports it
+OPERATORS[INSTRUCTION.IADD] = operator.iadd
+OPERATORS[INSTRUCTION.IAND] = operator.iand
+OPERATORS[INSTRUCTION.IFLOORDIV] = operator.ifloordiv
+OPERATORS[INSTRUCTION.ILEFT_SHIFT] = operator.ilshift
+OPERATORS[INSTRUCTION.IMATMULT] = operator.imatmul
+OPERATORS[INSTRUCTION.IMULT] = operator.imul
+OPERATORS[INSTRUCTION.IMOD] = operator.imod
+OPERATORS[INSTRUCTION.IOR] = operator.ior
+OPERATORS[INSTRUCTION.IPOW] = operator.ipow
+OPERATORS[INSTRUCTION.IRIGHT_SHIFT] = operator.irshift
+OPERATORS[INSTRUCTION.ISUB] = operator.isub
+OPERATORS[INSTRUCTION.IDIV] = operator.itruediv
+OPERATORS[INSTRUCTION.IXOR] = operator.ixor
+
+# C implementations run by the specialized instructions on int, float and
+# str operands, and by LOAD_CONST__BINARY_OP on any operands
+FUNCTIONS = {
+    INSTRUCTION.ADD: operator.add,
+    INSTRUCTION.AND: operator.and_,
+    INSTRUCTION.FLOORDIV: operator.floordiv,
+    INSTRUCTION.LEFT_SHIFT: operator.lshift,
+    INSTRUCTION.MATMULT: operator.matmul,
+    INSTRUCTION.MULT: operator.mul,
+    INSTRUCTION.MOD: operator.mod,
+    INSTRUCTION.OR: operator.or_,
+    INSTRUCTION.POW: operator.pow,
+    INSTRUCTION.RIGHT_SHIFT: operator.rshift,
+    INSTRUCTION.SUB: operator.sub,
+    INSTRUCTION.DIV: operator.truediv,
+    INSTRUCTION.XOR: operator.xor,
+}
+
+# the in-place ones as OPERATORS
+FUNCTIONS[INSTRUCTION.IADD] = operator.iadd
+FUNCTIONS[INSTRUCTION.IAND] = operator.iand
+FUNCTIONS[INSTRUCTION.IFLOORDIV] = operator.ifloordiv
+FUNCTIONS[INSTRUCTION.ILEFT_SHIFT] = operator.ilshift
+FUNCTIONS[INSTRUCTION.IMATMULT] = operator.imatmul
+FUNCTIONS[INSTRUCTION.IMULT] = operator.imul
+FUNCTIONS[INSTRUCTION.IMOD] = operator.imod
+FUNCTIONS[INSTRUCTION.IOR] = operator.ior
+FUNCTIONS[INSTRUCTION.IPOW] = operator.ipow
+FUNCTIONS[INSTRUCTION.IRIGHT_SHIFT] = operator.irshift
+FUNCTIONS[INSTRUCTION.ISUB] = operator.isub
+FUNCTIONS[INSTRUCTION.IDIV] = operator.itruediv
+FUNCTIONS[INSTRUCTION.IXOR] = operator.ixor
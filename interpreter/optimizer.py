@@ -0,0 +1,159 @@
+import dis
+import logging
+
+from interpreter.operators import INSTRUCTION, OPERATORS
+
+# set to False to execute the instructions as decoded, for debugging
+ENABLED = True
+
+# limits of the folded constants, folding `2 ** 10 ** 8` would hang the pass
+MAX_INT_BITS = 4096
+MAX_SIZE = 4096
+
+logger = logging.getLogger("optimizer")
+
+_NOPS = {"NOP", "RESUME", "EXTENDED_ARG"}
+# instructions never continuing to the next one
+_TERMINATORS = {
+    "RETURN_VALUE",
+    "RETURN_CONST",
+    "JUMP_FORWARD",
+    "JUMP_BACKWARD",
+    "JUMP_BACKWARD_NO_INTERRUPT",
+    "RERAISE",
+    "RAISE_VARARGS",
+}
+_UNARY = {
+    "UNARY_NEGATIVE": lambda a: -a,
+    "UNARY_INVERT": lambda a: ~a,
+    "UNARY_NOT": lambda a: not a,
+}
+
+
+def _size(value):
+    if isinstance(value, int):
+        return value.bit_length()
+    if isinstance(value, (str, bytes, tuple, frozenset)):
+        return len(value)
+    return 0
+
+
+def _safe(op, a, b):
+    """
+    False when the result of `a op b` could be too large to be computed at
+    load time, its size is estimated from the operands like CPython's safe_*
+    """
+    ints = isinstance(a, int) and isinstance(b, int)
+    if op == INSTRUCTION.MOD:
+        # a format string can build anything, `"%0400000000d" % 1`
+        return not isinstance(a, (str, bytes))
+    if op == INSTRUCTION.POW and ints:
+        return b < 0 or a.bit_length() * b <= MAX_INT_BITS
+    if op == INSTRUCTION.LEFT_SHIFT and ints:
+        return b < 0 or a.bit_length() + b <= MAX_INT_BITS
+    if op == INSTRUCTION.MULT:
+        if ints:
+            return a.bit_length() + b.bit_length() <= MAX_INT_BITS
+        for seq, count in ((a, b), (b, a)):
+            if isinstance(seq, (str, bytes, tuple)) and isinstance(count, int):
+                return len(seq) * count <= MAX_SIZE
+    if op == INSTRUCTION.ADD and isinstance(a, (str, bytes, tuple)):
+        return not isinstance(b, (str, bytes, tuple)) or len(a) + len(b) <= MAX_SIZE
+    return True
+
+
+def _binary(op):
+    def compute(a, b):
+        if not _safe(op, a, b):
+            raise OverflowError("constant too large to be folded")
+        return OPERATORS[op](a, b)
+
+    return compute
+
+
+def _const(first, value):
+    # the folded value isn't in co_consts, LOAD_CONST only use argval
+    return first._replace(
+        opname="LOAD_CONST",
+        opcode=dis.opmap["LOAD_CONST"],
+        arg=None,
+        argval=value,
+        argrepr=repr(value)[:40],
+    )
+
+
+def _fold(out, count, compute):
+    """
+    replace the `count` LOAD_CONST ending `out` by the result of `compute`
+    called with their values, return False when it can't be done
+    """
+    if len(out) < count:
+        return False
+    loads = out[len(out) - count :]
+    if any(inst.opname != "LOAD_CONST" for inst in loads):
+        return False
+    # a jump landing after the first load would miss its value
+    if any(inst.is_jump_target for inst in loads[1:]):
+        return False
+
+    try:
+        value = compute(*(inst.argval for inst in loads))
+    except Exception:
+        # the error is raised at runtime
+        return False
+    # the operands themselves can be large literals
+    if _size(value) > (MAX_INT_BITS if isinstance(value, int) else MAX_SIZE):
+        return False
+
+    del out[len(out) - count :]
+    out.append(_const(loads[0], value))
+    return True
+
+
+def optimize(insts, name=""):
+    """
+    fold the constant expressions, drop the no-op instructions and the
+    unreachable ones, the instructions keep their offsets so the jump table
+    still resolve the targets: a target removed land on the next instruction
+    """
+    if not ENABLED:
+        return insts
+
+    out = []
+    # flag of a removed jump target, moved to the next instruction kept
+    target = False
+    dead = False
+    for inst in insts:
+        if inst.is_jump_target:
+            dead = False
+        if dead:
+            continue
+
+        if target and not inst.is_jump_target:
+            inst = inst._replace(is_jump_target=True)
+        target = False
+
+        if inst.opname in _NOPS:
+            target = inst.is_jump_target
+            continue
+
+        if inst.is_jump_target:
+            out.append(inst)
+        elif inst.opname == "BINARY_OP" and inst.arg < INSTRUCTION.IADD:
+            if not _fold(out, 2, _binary(inst.arg)):
+                out.append(inst)
+        elif inst.opname in _UNARY:
+            if not _fold(out, 1, _UNARY[inst.opname]):
+                out.append(inst)
+        elif inst.opname == "BUILD_TUPLE" and inst.arg:
+            if not _fold(out, inst.arg, lambda *values: values):
+                out.append(inst)
+        else:
+            out.append(inst)
+
+        dead = inst.opname in _TERMINATORS
+
+    removed = len(insts) - len(out)
+    if removed:
+        logger.info("%s: %d instructions removed", name, removed)
+    return tuple(out)
@@ -0,0 +1,103 @@
+import json
+import time
+from collections import defaultdict
+
+
+class Profiler:
+    """
+    INSTRUCTION hook counting the executions and the wall time of each
+    instruction of each prepared code, the time of an instruction is the time
+    until the next one starts so a CALL of an interpreted function doesn't
+    include its body, but a native call does
+    """
+
+    def __init__(self, clock=time.perf_counter_ns):
+        self.clock = clock
+        # prepared code -> (counts, times) indexed like its instructions
+        self._codes = {}
+        self._previous = None
+        self._start = 0
+
+    def __call__(self, loop):
+        now = self.clock()
+        if self._previous is not None:
+            times, index = self._previous
+            times[index] += now - self._start
+
+        stats = self._codes.get(loop.code)
+        if stats is None:
+            length = len(loop.code.insts)
+            stats = self._codes[loop.code] = ([0] * length, [0] * length)
+
+        index = loop.frame.pointer - 1
+        stats[0][index] += 1
+        self._previous = (stats[1], index)
+        # don't count the time spent in the profiler
+        self._start = self.clock()
+
+    def stop(self):
+        """account the time of the last instruction"""
+        if self._previous is not None:
+            times, index = self._previous
+            times[index] += self.clock() - self._start
+            self._previous = None
+
+    def stats(self):
+        """counts and times aggregated by opcode, by code object and by source line"""
+        opcodes = defaultdict(lambda: [0, 0])
+        codes = defaultdict(lambda: [0, 0])
+        lines = defaultdict(lambda: [0, 0])
+
+        for code, (counts, times) in self._codes.items():
+            filename = code.code.co_filename
+            code_key = f"{code.name} ({filename}:{code.code.co_firstlineno})"
+            for inst, count, elapsed in zip(code.insts, counts, times):
+                if not count:
+                    continue
+                lineno = inst.positions.lineno if inst.positions else None
+                for table, key in (
+                    (opcodes, inst.opname),
+                    (codes, code_key),
+                    (lines, f"{filename}:{lineno}"),
+                ):
+                    table[key][0] += count
+                    table[key][1] += elapsed
+
+        def _sorted(table, name):
+            return [
+                {name: key, "count": count, "time_ns": elapsed}
+                for key, (count, elapsed) in sorted(
+                    table.items(), key=lambda item: item[1][1], reverse=True
+                )
+            ]
+
+        return {
+            "total": {
+                "count": sum(count for count, _ in opcodes.values()),
+                "time_ns": sum(elapsed for _, elapsed in opcodes.values()),
+            },
+            "opcodes": _sorted(opcodes, "opname"),
+            "codes": _sorted(codes, "code"),
+            "lines": _sorted(lines, "line"),
+        }
+
+    def dump_json(self, path):
+        with open(path, "w") as f:
+            json.dump(self.stats(), f, indent=2)
+
+    def report(self, file=None, limit=20):
+        stats = self.stats()
+        total = stats["total"]["time_ns"] or 1
+
+        print(
+            f"{stats['total']['count']} instructions in {total / 1e6:.3f} ms",
+            file=file,
+        )
+        for section, name in (("opcodes", "opname"), ("codes", "code"), ("lines", "line")):
+            print(f"\n{'count':>10} {'time(ms)':>10} {'%':>6}  {name}", file=file)
+            for row in stats[section][:limit]:
+                print(
+                    f"{row['count']:>10} {row['time_ns'] / 1e6:>10.3f}"
+                    f" {row['time_ns'] * 100 / total:>6.2f}  {row[name]}",
+                    file=file,
+                )
@@ -0,0 +1,167 @@
+"""
+run many ExecutionLoop time-sliced in one thread: each loop runs its
+instruction budget then waits at the end of the queue, a loop never
+blocks the others longer than a slice
+"""
+
+import logging
+import time
+from collections import deque
+
+from interpreter.debug import currentLoop
+from interpreter.loop import ExecutionLoop
+
+# instructions run by a loop before it's preempted
+BUDGET = 1000
+
+logger = logging.getLogger("scheduler")
+
+
+class LimitExceeded(Exception):
+    """error of a task stopped by its limits"""
+
+
+class Task:
+    """a loop run by the scheduler, its state and accounting"""
+
+    def __init__(self, loop, budget=BUDGET, max_instructions=None, max_cpu_s=None):
+        self.loop = loop
+        self.name = loop.name
+        self.budget = budget
+        # hard limits, the task is killed beyond them
+        self.max_instructions = max_instructions
+        self.max_cpu_s = max_cpu_s
+
+        # ready, done, failed or killed
+        self.state = "ready"
+        self.result = None
+        self.error = None
+
+        self.slices = 0
+        # cpu time of the thread during the slices, the python calls included
+        self.cpu_s = 0.0
+        self.spawned = time.perf_counter()
+        self.wall_s = None
+        # longest time spent in the queue between two slices
+        self.max_wait_s = 0.0
+        self.queued = self.spawned
+
+    @property
+    def instructions(self):
+        return self.loop.executed
+
+    @property
+    def done(self):
+        return self.state != "ready"
+
+    def step(self):
+        """run a slice of the task"""
+        started = time.perf_counter()
+        self.max_wait_s = max(self.max_wait_s, started - self.queued)
+
+        budget = self.budget
+        if self.max_instructions is not None:
+            budget = min(budget, self.max_instructions - self.instructions)
+
+        cpu = time.thread_time()
+        try:
+            with currentLoop(self.loop):
+                result = self.loop.run_slice(budget)
+        except (Exception, SystemExit) as error:
+            self.finish("failed", error=error)
+            return
+        finally:
+            self.cpu_s += time.thread_time() - cpu
+            self.slices += 1
+
+        if result is not None:
+            self.finish("done", result=result[0])
+        elif (
+            self.max_instructions is not None
+            and self.instructions >= self.max_instructions
+        ):
+            self.kill(f"{self.instructions} instructions run")
+        elif self.max_cpu_s is not None and self.cpu_s >= self.max_cpu_s:
+            self.kill(f"{self.cpu_s:.3f}s of cpu used")
+        self.queued = time.perf_counter()
+
+    def kill(self, reason):
+        self.finish("killed", error=LimitExceeded(f"{self.name}: {reason}"))
+
+    def finish(self, state, result=None, error=None):
+        self.state = state
+        self.result = result
+        self.error = error
+        self.wall_s = time.perf_counter() - self.spawned
+        if error is not None:
+            logger.warning("%s %s: %r", self.name, state, error)
+
+    def report(self):
+        return {
+            "name": self.name,
+            "state": self.state,
+            "error": None if self.error is None else repr(self.error),
+            "instructions": self.instructions,
+            "slices": self.slices,
+            "cpu_s": self.cpu_s,
+            "wall_s": self.wall_s,
+            "max_wait_s": self.max_wait_s,
+        }
+
+    def __repr__(self):
+        return (
+            f"<Task name={self.name} state={self.state}"
+            f" instructions={self.instructions} cpu={self.cpu_s:.3f}s>"
+        )
+
+
+class Scheduler:
+    """round robin of the tasks, one slice each"""
+
+    def __init__(self, budget=BUDGET):
+        self.budget = budget
+        self.tasks = []
+        self.ready = deque()
+
+    def spawn(
+        self,
+        code,
+        name=None,
+        co_globals=None,
+        budget=None,
+        max_instructions=None,
+        max_cpu_s=None,
+    ):
+        """a task running the module `code`"""
+        name = name or f"Task-{len(self.tasks)}"
+        loop = ExecutionLoop(
+            code,
+            name=name,
+            co_globals={"__name__": "__main__"} if co_globals is None else co_globals,
+        )
+        return self.add(loop, budget, max_instructions, max_cpu_s)
+
+    def add(self, loop, budget=None, max_instructions=None, max_cpu_s=None):
+        task = Task(loop, budget or self.budget, max_instructions, max_cpu_s)
+        self.tasks.append(task)
+        self.ready.append(task)
+        return task
+
+    def step(self):
+        """run a slice of the next task, False when all the tasks are done"""
+        if not self.ready:
+            return False
+        task = self.ready.popleft()
+        task.step()
+        if not task.done:
+            self.ready.append(task)
+        return True
+
+    def run(self):
+        """run the tasks up to their end"""
+        while self.step():
+            pass
+        return self.tasks
+
+    def __repr__(self):
+        return f"<Scheduler tasks={len(self.tasks)} ready={len(self.ready)}>"
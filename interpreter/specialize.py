@@ -0,0 +1,70 @@
+from interpreter.compare import FUNCTIONS as COMPARE_FUNCTIONS
+from interpreter.dispatch import OPMAP, define
+from interpreter.operators import FUNCTIONS as OPERATOR_FUNCTIONS
+from interpreter.operators import INSTRUCTION as OPERATOR
+
+# executions of a generic instruction before it's specialized
+WARMUP = 8
+# executions of the generic instruction before trying again,
+# when the operands types don't allow a specialization or changed
+BACKOFF = 64
+
+_TYPES = {int: "INT", float: "FLOAT", str: "STR"}
+
+# operations written inline in their handler, the others operations
+# of a type call the C function stored in the instruction argval
+_INLINE = {
+    (int, OPERATOR.ADD): "BINARY_OP_ADD_INT",
+    (int, OPERATOR.IADD): "BINARY_OP_ADD_INT",
+    (int, OPERATOR.SUB): "BINARY_OP_SUBTRACT_INT",
+    (int, OPERATOR.ISUB): "BINARY_OP_SUBTRACT_INT",
+    (int, OPERATOR.MULT): "BINARY_OP_MULTIPLY_INT",
+    (int, OPERATOR.IMULT): "BINARY_OP_MULTIPLY_INT",
+    (float, OPERATOR.ADD): "BINARY_OP_ADD_FLOAT",
+    (float, OPERATOR.IADD): "BINARY_OP_ADD_FLOAT",
+    (float, OPERATOR.SUB): "BINARY_OP_SUBTRACT_FLOAT",
+    (float, OPERATOR.ISUB): "BINARY_OP_SUBTRACT_FLOAT",
+    (float, OPERATOR.MULT): "BINARY_OP_MULTIPLY_FLOAT",
+    (float, OPERATOR.IMULT): "BINARY_OP_MULTIPLY_FLOAT",
+    (str, OPERATOR.ADD): "BINARY_OP_ADD_STR",
+    (str, OPERATOR.IADD): "BINARY_OP_ADD_STR",
+}
+
+for _opname in dict.fromkeys(_INLINE.values()):
+    define(_opname, "BINARY_OP")
+for _name in _TYPES.values():
+    define(f"BINARY_OP_{_name}", "BINARY_OP")
+    define(f"COMPARE_OP_{_name}", "COMPARE_OP")
+
+
+def _specialize(code, index, inst, opname, functions):
+    if code.fast_insts[index] is not code.insts[index]:
+        # a superinstruction start here, keep it
+        code.counters[index] = -BACKOFF
+        return
+    code.fast_insts[index] = inst._replace(
+        opname=opname, opcode=OPMAP[opname], argval=functions[inst.arg]
+    )
+
+
+def specialize_binary_op(code, index, inst, first, second):
+    kind = type(first)
+    if kind is not type(second) or kind not in _TYPES:
+        code.counters[index] = -BACKOFF
+        return
+    opname = _INLINE.get((kind, inst.arg), f"BINARY_OP_{_TYPES[kind]}")
+    _specialize(code, index, inst, opname, OPERATOR_FUNCTIONS)
+
+
+def specialize_compare_op(code, index, inst, first, second):
+    kind = type(first)
+    if kind is not type(second) or kind not in _TYPES:
+        code.counters[index] = -BACKOFF
+        return
+    _specialize(code, index, inst, f"COMPARE_OP_{_TYPES[kind]}", COMPARE_FUNCTIONS)
+
+
+def deoptimize(code, index):
+    """put back the generic instruction, the operands types changed"""
+    code.fast_insts[index] = code.insts[index]
+    code.counters[index] = -BACKOFF
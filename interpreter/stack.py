@@ -2,38 +2,62 @@ from functools import cache
 
 
 class Stack(list):
-    def __init__(self, *ar, **kw):
+    """
+    operand stack of a frame, `size` is the maximum depth computed
+    by the compiler (co_stacksize)
+    """
+
+    __slots__ = ("size",)
+
+    def __init__(self, *ar, size=0, **kw):
         super().__init__(*ar, **kw)
-        self.pointer = len(self) - 1
+        self.size = size
 
-    def jump_forward(self, padding):
-        offest = (self.actual.arg * 2) + padding + self.actual.offset
-        while self[self.pointer].offset < offest:
-            self.pointer -= 1
+    # bulk operations of the instructions taking many operands, one slice
+    # and one `del` in place of a `pop` per operand, the deepest value first
 
-    def jump_backward(self, padding):
-        offest = self.actual.offset - (self.actual.arg * 2 - padding)
-        self.pointer += 1
-        while self[self.pointer].offset > offest:
-            self.pointer += 1
+    def popn(self, count):
+        """remove the `count` values on top, as a tuple"""
+        start = len(self) - count
+        values = tuple(self[start:])
+        del self[start:]
+        return values
 
-    def next(self):
-        self.actual = self[self.pointer]
-        self.pointer -= 1
-        return self.actual
+    def peekn(self, count):
+        """the `count` values on top as a list, left on the stack"""
+        return self[len(self) - count :]
+
+    def dropn(self, count):
+        """remove the `count` values on top"""
+        del self[len(self) - count :]
 
-    @property
-    def next_inst(self):
-        return self[self.pointer]
 
-    def pop(self):
-        try:
-            return super().pop()
-        except IndexError:
-            return None
+class Frame:
+    """execution state of a prepared code: instructions, pointer and operand stack"""
 
-    def __bool__(self):
-        return self.pointer >= 0
+    __slots__ = ("insts", "jumps", "pointer", "stack")
+
+    def __init__(self, code):
+        self.insts = code.insts
+        self.jumps = code.jumps
+        # index of the next instruction to execute
+        self.pointer = 0
+        self.stack = Stack(size=code.stacksize)
+
+    def reset(self, code):
+        """reuse the frame for `code`, the stack must be empty"""
+        self.insts = code.insts
+        self.jumps = code.jumps
+        self.pointer = 0
+        self.stack.size = code.stacksize
+
+    def jump(self):
+        # the pointer already moved past the actual instruction
+        self.pointer = self.jumps[self.pointer - 1]
+
+    @property
+    def actual(self):
+        return self.insts[self.pointer - 1]
 
 
 @cache
@@ -43,3 +67,13 @@ class _Null:
 
 
 NULL = _Null()
+
+
+# value of the fast locals never set or deleted, see LOAD_FAST_CHECK
+@cache
+class _Unbound:
+    def __repr__(self):
+        return "UNBOUND"
+
+
+UNBOUND = _Unbound()
@@ -0,0 +1,50 @@
+from interpreter.compare import FUNCTIONS as COMPARE_FUNCTIONS
+from interpreter.dispatch import OPMAP, define
+from interpreter.operators import FUNCTIONS as OPERATOR_FUNCTIONS
+
+# pairs of instructions always found together in 3.12 bytecode,
+# executed by a single handler
+SUPERINSTRUCTIONS = {
+    ("LOAD_FAST", "LOAD_FAST"): "LOAD_FAST__LOAD_FAST",
+    ("LOAD_CONST", "BINARY_OP"): "LOAD_CONST__BINARY_OP",
+    ("COMPARE_OP", "POP_JUMP_IF_FALSE"): "COMPARE_OP__POP_JUMP_IF_FALSE",
+    ("LOAD_GLOBAL", "CALL"): "LOAD_GLOBAL__CALL",
+    ("FOR_ITER", "STORE_FAST"): "FOR_ITER__STORE_FAST",
+}
+
+for _pair, _opname in SUPERINSTRUCTIONS.items():
+    define(_opname, *_pair)
+
+# argval of the superinstructions computing an operation: its C function,
+# resolved once here instead of each execution, the other ones keep the
+# argval of their first instruction
+_ARGVALS = {
+    # the constant and the operator
+    "LOAD_CONST__BINARY_OP": lambda first, second: (
+        first.argval,
+        OPERATOR_FUNCTIONS[second.arg],
+    ),
+    "COMPARE_OP__POP_JUMP_IF_FALSE": lambda first, second: COMPARE_FUNCTIONS[first.arg],
+}
+
+
+def fuse(insts):
+    """
+    replace the first instruction of each pair of SUPERINSTRUCTIONS by its
+    superinstruction, the second one is kept at its index: the superinstruction
+    handler read its argument there and skip it, and a jump targeting it still
+    execute it alone, so the jumps targets don't change
+    """
+    fused = list(insts)
+    index = 0
+    while index < len(fused) - 1:
+        pair = (insts[index].opname, insts[index + 1].opname)
+        opname = SUPERINSTRUCTIONS.get(pair)
+        if opname is None:
+            index += 1
+            continue
+        first, second = insts[index], insts[index + 1]
+        argval = _ARGVALS[opname](first, second) if opname in _ARGVALS else first.argval
+        fused[index] = first._replace(opname=opname, opcode=OPMAP[opname], argval=argval)
+        index += 2
+    return fused
@@ -0,0 +1,192 @@
+"""
+INSTRUCTION hook recording the last instructions run in a fixed size
+binary ring buffer, dumped when the program crashes and replayed offline,
+see `replay`
+
+the dump is the magic, the length of the json header, the header (codes
+and loops seen, counts) then the records from the oldest to the newest
+"""
+
+import json
+import os
+import struct
+import time
+
+MAGIC = b"PYITRACE"
+# loop id, code id, offset, opcode, stack depth, timestamp (ns)
+RECORD = struct.Struct("<IIIHHq")
+_HEADER = struct.Struct("<I")
+
+# records kept by default, the last instructions before the crash
+SIZE = 65536
+
+
+class Tracer:
+    def __init__(self, size=SIZE, clock=time.perf_counter_ns):
+        self.size = size
+        self.clock = clock
+        self.buffer = bytearray(size * RECORD.size)
+        # records written since the start, the ring holds the last `size`
+        self.count = 0
+        # the loops are identified by their serial, each call has its own
+        # id even when its loop is recycled: serial -> name of the loops
+        # seen, pruned to the records of the ring, see `loop_id`
+        self._names = {}
+        # ids of the prepared codes, in the order they are seen
+        self._codes = {}
+        # serial and ids of the loop of the previous record
+        self._serial = None
+        self._ids = (0, 0)
+        self._pack = RECORD.pack_into
+
+    def __call__(self, loop):
+        if loop.serial != self._serial:
+            self._serial = loop.serial
+            self._ids = (self.loop_id(loop), self.code_id(loop.code))
+        frame = loop.frame
+        inst = frame.insts[frame.pointer - 1]
+        self._pack(
+            self.buffer,
+            (self.count % self.size) * RECORD.size,
+            *self._ids,
+            inst.offset,
+            inst.opcode,
+            len(loop.stack),
+            self.clock(),
+        )
+        self.count += 1
+
+    def loop_id(self, loop):
+        loop_id = loop.serial & 0xFFFFFFFF
+        names = self._names
+        if loop_id not in names:
+            if len(names) >= 2 * self.size:
+                # forget the loops whose records left the ring
+                kept = {record[0] for record in RECORD.iter_unpack(self.records())}
+                names = self._names = {
+                    key: name for key, name in names.items() if key in kept
+                }
+            names[loop_id] = loop.name
+        return loop_id
+
+    def code_id(self, code):
+        code_id = self._codes.get(code)
+        if code_id is None:
+            code_id = self._codes[code] = len(self._codes)
+        return code_id
+
+    def records(self):
+        """raw records of the ring, oldest first"""
+        kept = min(self.count, self.size)
+        start = (self.count - kept) % self.size * RECORD.size
+        end = start + kept * RECORD.size
+        if end <= len(self.buffer):
+            return bytes(self.buffer[start:end])
+        return bytes(self.buffer[start:]) + bytes(
+            self.buffer[: end - len(self.buffer)]
+        )
+
+    def header(self, error=None):
+        codes = []
+        for prepared in self._codes:
+            code = prepared.code
+            codes.append(
+                {
+                    "name": prepared.name,
+                    "filename": code.co_filename,
+                    "insts": [
+                        (
+                            inst.offset,
+                            inst.opname,
+                            inst.argrepr,
+                            inst.positions.lineno if inst.positions else None,
+                        )
+                        for inst in prepared.insts
+                    ],
+                }
+            )
+        return {
+            "count": self.count,
+            "size": self.size,
+            "loops": self._names,
+            "codes": codes,
+            "error": None if error is None else repr(error),
+        }
+
+    def dump(self, path, error=None):
+        header = json.dumps(self.header(error)).encode()
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(MAGIC)
+            f.write(_HEADER.pack(len(header)))
+            f.write(header)
+            f.write(self.records())
+        os.replace(tmp, path)
+
+
+def load(path):
+    """header and records of a dump, the records decoded as tuples"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a trace dump")
+    start = len(MAGIC) + _HEADER.size
+    (length,) = _HEADER.unpack_from(data, len(MAGIC))
+    header = json.loads(data[start : start + length])
+    return header, list(RECORD.iter_unpack(data[start + length :]))
+
+
+def replay(path, last=None, step=None, file=None):
+    """
+    print the records of a dump, the `last` ones: a line per instruction,
+    or one screen per instruction as `--debug` when `step` is given
+    """
+    header, records = load(path)
+    if last is not None:
+        records = records[-last:]
+    codes = header["codes"]
+    # json keys are strings
+    names = {int(loop_id): name for loop_id, name in header["loops"].items()}
+    # offset -> instruction of each code
+    tables = [{inst[0]: inst for inst in code["insts"]} for code in codes]
+
+    skipped = header["count"] - len(records)
+    print(
+        f"{header['count']} instructions traced, the last {len(records)}"
+        f" ({skipped} before them not shown)",
+        file=file,
+    )
+    previous = records[0][5] if records else 0
+    for loop_id, code_id, offset, opcode, depth, timestamp in records:
+        code = codes[code_id]
+        _, opname, argrepr, lineno = tables[code_id].get(
+            offset, (offset, f"<opcode {opcode}>", "", None)
+        )
+        elapsed = (timestamp - previous) / 1000
+        previous = timestamp
+        where = f"{code['filename']}:{lineno}"
+        # the calls of a function are told apart by their id
+        loop = f"{names[loop_id]} #{loop_id}"
+        if step is None:
+            print(
+                f"{loop:<30} {code['name']:<20} {where:<30}"
+                f" {offset:>6} {opname:<24} {argrepr:<20}"
+                f" stack={depth:<3} +{elapsed:.1f}us",
+                file=file,
+            )
+            continue
+
+        os.system("clear")
+        print(f"Loop[{loop}]", file=file)
+        print(f"code: {code['name']} ({where})", file=file)
+        print(f"offset: {offset}", file=file)
+        print(f"instruction: {opname} {argrepr}", file=file)
+        print(f"Stack({depth})", file=file)
+        print(f"elapsed: +{elapsed:.1f}us", file=file)
+        if isinstance(step, str):
+            input()
+        else:
+            time.sleep(step)
+
+    if header["error"]:
+        print(f"error: {header['error']}", file=file)
@@ -21,6 +21,13 @@ print(c)
 c = a**5 % 3 - 1 & 4 | 6 - 6**888
 print(c)
 
+items = [1]
+alias = items
+items += (2, 3)
+items *= 2
+items += [4]
+print(items, alias, items is alias)
+
 print("-- comprehension list...")
 lst = [i for i in range(100)]
 print(lst)
@@ -50,6 +57,37 @@ for v in iterator(10):
     print("[yield value] " + str(v))
 
 
+print("-- generator primed with next then sent...")
+
+
+def accumulate():
+    total = 0
+    while True:
+        value = yield total
+        if value is not None:
+            total += value
+
+
+acc = accumulate()
+for _ in range(12):
+    next(acc)
+print(acc.send(5), acc.send(2), next(acc))
+
+seen = []
+
+
+def tracked(nb):
+    for i in range(nb):
+        seen.append(i)
+        yield i
+
+
+gen = tracked(100)
+for _ in range(10):
+    next(gen)
+print(len(seen))
+
+
 print("-- unpack sequences...")
 
 a, b = ["first", "seconde"]
@@ -67,3 +105,143 @@ print("-- from X import ...")
 from datetime import datetime as renamed
 
 print(renamed.now())
+
+print("-- call errors...")
+
+
+def positional(a, b, c, *, d):
+    pass
+
+
+def defaults(a, b=1, *, k=2):
+    pass
+
+
+def positional_only(a, b, /, c=0):
+    pass
+
+
+def no_argument():
+    pass
+
+
+for call in (
+    lambda: no_argument(1),
+    lambda: positional(),
+    lambda: positional(1, 2),
+    lambda: positional(1, 2, 3),
+    lambda: positional(1, 2, 3, 4, d=5),
+    lambda: defaults(),
+    lambda: defaults(1, 2, 3),
+    lambda: defaults(1, 2, 3, k=4),
+    lambda: defaults(1, a=2),
+    lambda: defaults(1, z=2),
+    lambda: positional_only(a=1, b=2),
+    lambda: positional_only(1, 2, 3, 4),
+):
+    try:
+        call()
+    except TypeError as error:
+        print(error)
+
+print("-- exception chaining...")
+import sys
+import traceback
+
+
+def last_line():
+    return traceback.format_exc().splitlines()[-1]
+
+
+try:
+    try:
+        1 / 0
+    except ZeroDivisionError:
+        raise ValueError("raised in the handler")
+except ValueError as error:
+    print(repr(error), repr(error.__context__), repr(error.__cause__))
+
+try:
+    try:
+        1 / 0
+    except ZeroDivisionError as error:
+        raise KeyError("from") from error
+except KeyError as error:
+    print(repr(error), repr(error.__context__), repr(error.__cause__))
+
+try:
+    try:
+        raise TypeError("first")
+    except TypeError:
+        int("not a number")
+except ValueError as error:
+    print(repr(error), repr(error.__context__))
+
+try:
+    try:
+        raise TypeError("first")
+    except TypeError:
+        [][1]
+except IndexError as error:
+    print(repr(error), repr(error.__context__))
+
+try:
+    raise RuntimeError("outside")
+except RuntimeError as error:
+    print(repr(error.__context__))
+
+print("-- exception info in handler...")
+try:
+    1 / 0
+except ZeroDivisionError:
+    print(sys.exc_info()[0], repr(sys.exc_info()[1]))
+    print(traceback.format_exc().splitlines()[-1])
+    print(last_line())
+print(sys.exc_info())
+
+print("-- deep recursion with a hook...")
+from functools import partial
+
+from interpreter.loop import ExecutionLoop
+
+deep = ExecutionLoop(
+    compile(
+        "def depth(n):\n"
+        "    if n == 0:\n"
+        "        return 0\n"
+        "    return depth(n - 1) + 1\n"
+        "result = depth(3000)\n",
+        "deep.py",
+        "exec",
+    )
+)
+events = {"INSTRUCTION": 0, "CALL": 0, "RETURN": 0}
+
+
+def count(event, loop):
+    events[event] += 1
+
+
+for event in events:
+    deep.on_notify(event, partial(count, event))
+deep.run()
+# the instructions counted depend on the optimizer, --no-optimize
+print(deep.co_globals["result"], events["INSTRUCTION"] > 0, events["CALL"], events["RETURN"])
+
+print("-- loops given to the hooks...")
+called = ExecutionLoop(
+    compile(
+        "def a(x):\n"
+        "    return x\n"
+        "def b(x):\n"
+        "    return x\n"
+        "a(1)\n"
+        "b(2)\n",
+        "called.py",
+        "exec",
+    )
+)
+loops = []
+called.on_notify("CALL", loops.append)
+called.run()
+print([loop.name for loop in loops])